@@ -1,5 +1,6 @@
 import gui3d
 
+from ._modifierMetadata import ModifierMetadata
 from ._ui import CreateUI
 
 
@@ -12,6 +13,11 @@ class FaceParametrizationTaskView(gui3d.TaskView):
     def __create_ui(self):
         CreateUI(self)
 
+    def onHumanChanged(self, event):
+        # Value changes keep the modifier set intact, anything else may add or drop modifiers
+        if event.change != 'modifier':
+            ModifierMetadata.invalidate()
+
 
 def load(app):
     category = app.getCategory('Utilities')
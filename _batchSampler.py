@@ -0,0 +1,33 @@
+import numpy as np
+
+
+class BatchSampler:
+    """Draws whole (n_humans x n_modifiers) matrices of random modifier values at once.
+
+    Every column is a gaussian centered on the modifier default with a standard deviation of sigma times the
+    modifier range. Values falling outside [min, max] are reflected back once around the violated bound and
+    then clipped."""
+
+    def __init__(self, minimum, maximum, default, sigma):
+        self.minimum = np.asarray(minimum, dtype=np.float64)
+        self.maximum = np.asarray(maximum, dtype=np.float64)
+        self.default = np.asarray(default, dtype=np.float64)
+        self.scale = np.asarray(sigma, dtype=np.float64) * np.abs(self.maximum - self.minimum)
+
+    @classmethod
+    def from_modifiers(cls, modifiers):
+        """Build a sampler from (name, min, max, default, sigma) tuples, one column per tuple."""
+        columns = list(zip(*[modifier[1:5] for modifier in modifiers])) or [(), (), (), ()]
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.default)
+
+    def sample(self, n, rng):
+        values = rng.normal(self.default, self.scale, size=(n, len(self)))
+
+        below = values < self.minimum
+        above = values > self.maximum
+        values = np.where(below, 2 * self.minimum - values, np.where(above, 2 * self.maximum - values, values))
+
+        return np.clip(values, self.minimum, self.maximum, out=values)
@@ -0,0 +1,148 @@
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+def mix64(value):
+    """Stateless 64 bit mixing function (splitmix64 finalizer). Used to derive keys and seeds from a run seed."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def mix64_array(values):
+    """mix64 applied element-wise to an array of uint64, with the same results as the scalar version."""
+    values = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class IndexPermutation:
+    """Seeded pseudo-random bijection of range(size). Every position is mapped independently through a small
+    Feistel network, cycle walking until the result falls inside the range, so the permutation is never
+    materialized and memory does not depend on size."""
+
+    ROUNDS = 4
+
+    def __init__(self, size, seed):
+        if size < 0:
+            raise ValueError("The size of a permutation cannot be negative")
+
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [mix64((int(seed) & _MASK64) * self.ROUNDS + i) for i in range(self.ROUNDS)]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError("Position " + str(position) + " is out of range for a permutation of " + str(self.size))
+
+        value = self.__feistel(position)
+        while value >= self.size:
+            value = self.__feistel(value)
+
+        return value
+
+    def take(self, positions):
+        """Vectorized lookup of many positions at once, returned as an int64 array."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.size and (positions.min() < 0 or positions.max() >= self.size):
+            raise IndexError("Positions are out of range for a permutation of " + str(self.size))
+
+        values = self.__feistel_array(positions.astype(np.uint64))
+        outside = values >= np.uint64(self.size)
+        while outside.any():
+            values[outside] = self.__feistel_array(values[outside])
+            outside = values >= np.uint64(self.size)
+
+        return values.astype(np.int64)
+
+    def __feistel_array(self, values):
+        half_bits = np.uint64(self.half_bits)
+        half_mask = np.uint64(self.half_mask)
+        left = values >> half_bits
+        right = values & half_mask
+
+        for key in self.keys:
+            left, right = right, left ^ (mix64_array(right ^ np.uint64(key)) & half_mask)
+
+        return (left << half_bits) | right
+
+    def __feistel(self, value):
+        left = value >> self.half_bits
+        right = value & self.half_mask
+
+        for key in self.keys:
+            left, right = right, left ^ (mix64(right ^ key) & self.half_mask)
+
+        return (left << self.half_bits) | right
+
+
+class CombinationStream:
+    """Lazy view over the Cartesian product of the given value lists, in the same order as itertools.product.
+    The k-th combination is decoded from its mixed-radix index on demand; when a seed is given the positions
+    are walked through an IndexPermutation, so the stream behaves like a shuffled grid that can be sliced
+    anywhere without producing the preceding combinations."""
+
+    def __init__(self, values, seed=None):
+        self.values = [tuple(value) for value in values]
+        self.radices = [len(value) for value in self.values]
+
+        self.size = 1
+        for radix in self.radices:
+            self.size *= radix
+
+        self.permutation = IndexPermutation(self.size, seed) if seed is not None else None
+        # Object arrays keep the original values, so take() returns the same tuples as decode()
+        self.value_arrays = [np.array(value + (None,), dtype=object)[:-1] for value in self.values]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError("Position " + str(position) + " is out of range for " + str(self.size) + " combinations")
+
+        index = self.permutation[position] if self.permutation is not None else position
+        return self.decode(index)
+
+    def __iter__(self):
+        return self.slice(0, self.size)
+
+    def decode(self, index):
+        combination = [None] * len(self.radices)
+
+        for axis in range(len(self.radices) - 1, -1, -1):
+            index, digit = divmod(index, self.radices[axis])
+            combination[axis] = self.values[axis][digit]
+
+        return tuple(combination)
+
+    def take(self, positions):
+        """Vectorized lookup of many positions at once: the permutation and the mixed-radix decoding run over the
+        whole array. Returns the same list of tuples as indexing the positions one by one."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.size and (positions.min() < 0 or positions.max() >= self.size):
+            raise IndexError("Positions are out of range for " + str(self.size) + " combinations")
+
+        # Indices of larger grids do not fit in an int64
+        if self.size > np.iinfo(np.int64).max:
+            return [self[position] for position in positions.tolist()]
+
+        indices = self.permutation.take(positions) if self.permutation is not None else positions
+        columns = [None] * len(self.radices)
+
+        for axis in range(len(self.radices) - 1, -1, -1):
+            indices, digits = np.divmod(indices, self.radices[axis])
+            columns[axis] = self.value_arrays[axis][digits].tolist()
+
+        return list(zip(*columns)) if columns else [()] * len(positions)
+
+    def slice(self, start, stop):
+        for position in range(max(0, start), min(stop, self.size)):
+            yield self[position]
@@ -0,0 +1,46 @@
+"""Locations of the files the plugin reads and writes outside of its own folder.
+
+Every location can be set with an environment variable:
+
+    FACEPAR_MPFB_DIR    folder of the MPFB2 add-on (the one holding data/ and entities/). By default the folder of
+                        the importable mpfb package, else the default Blender 4.0 add-on folder of the user
+    FACEPAR_TARGETS_DIR folder of the MPFB2 targets, by default <mpfb>/data/targets
+    FACEPAR_CACHE_DIR   folder of the target index, compiled targets and baked macros, by default
+                        ~/.cache/faceparametrization
+
+Nothing is looked up at import time, the functions are called where the locations are needed."""
+import importlib.util
+import os
+from functools import lru_cache
+
+_DEFAULT_MPFB_DIR = os.path.join(os.path.expanduser("~"), ".config", "blender", "4.0", "scripts", "addons", "mpfb")
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "faceparametrization")
+
+
+@lru_cache(maxsize=None)
+def _installed_mpfb_dir():
+    try:
+        spec = importlib.util.find_spec("mpfb")
+    except (ImportError, ValueError):
+        spec = None
+
+    if spec is not None and spec.submodule_search_locations:
+        return list(spec.submodule_search_locations)[0]
+    return None
+
+
+def mpfb_dir():
+    return os.environ.get("FACEPAR_MPFB_DIR") or _installed_mpfb_dir() or _DEFAULT_MPFB_DIR
+
+
+def targets_dir():
+    return os.environ.get("FACEPAR_TARGETS_DIR") or os.path.join(mpfb_dir(), "data", "targets")
+
+
+def object_properties_dir(name):
+    """Folder of the json property definitions of mpfb called name, e.g. "generalproperties"."""
+    return os.path.join(mpfb_dir(), "entities", "objectproperties", name)
+
+
+def cache_dir():
+    return os.environ.get("FACEPAR_CACHE_DIR") or _DEFAULT_CACHE_DIR
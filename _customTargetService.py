@@ -1,33 +1,20 @@
-# This is very annoying, but the maximum length of a shape key name is 61 characters
-# in blender. The combinations used in MH filenames tend to be longer than that.
-import gzip
 import json
 import os
-import re
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 import bpy
+import numpy as np
 
-from pathlib import Path
+from mpfb.services.logservice import LogService
+from . import _config
 from ._blenderconfigset import BlenderConfigSet
+from ._macroBakeCache import MacroBakeCache
+from . import _shapekeyCodec
+from ._targetCache import TargetCache, sum_targets
+from ._targetIndex import TargetIndex
 
-_SHAPEKEY_ENCODING = [
-    ["macrodetail", "$md"],
-    ["female", "$fe"],
-    ["male", "$ma"],
-    ["caucasian", "$ca"],
-    ["asian", "$as"],
-    ["african", "$af"],
-    ["average", "$av"],
-    ["weight", "$wg"],
-    ["height", "$hg"],
-    ["muscle", "$mu"],
-    ["proportions", "$pr"],
-    ["firmness", "$fi"],
-    ["ideal", "$id"],
-    ["uncommon", "$un"],
-    ["young", "$yn"],
-    ["child", "$ch"],
-]
+_LOG = LogService.get_logger("faceparametrization.targetservice")
 
 _OPPOSITES = [
     "decr-incr",
@@ -42,18 +29,32 @@ _OPPOSITES = [
 
 _ODD_TARGET_NAMES = []
 
-_TARGETS_DIR = "/home/alfredo/.config/blender/4.0/scripts/addons/mpfb/data/targets"
-_MACRO_CONFIG = dict()
-_MACRO_FILE = os.path.join(_TARGETS_DIR, "macrodetails", "macro.json")
-_MACRO_PATH_PATTERN = "/mpfb/data/targets/macrodetails/"
+# Read from the locations in _config on first use, so importing the module touches no file
+_MACRO_CONFIG = None
+_GENERAL_OBJECT_PROPERTIES = None
+
+_MACRO_NAMES = ["gender", "age", "muscle", "weight", "proportions", "height", "cupsize", "firmness"]
+
+# Macro values are rounded to this many decimals (the precision of the .mhm files) before the target stack is
+# computed, so that every human with the same phenotype shares one entry of the target stack cache
+_MACRO_KEY_DECIMALS = 6
+_MACRO_STACK_CACHE_SIZE = 256
+
+_TARGET_INDEX = None
+_TARGET_CACHE = None
+_MACRO_BAKE_CACHE = None
+
+# Shape key holding the whole macro target stack when macro details are baked
+_BAKED_MACRO_SHAPEKEY_NAME = "$md-baked"
+
+# Shape key holding the whole target stack loaded by bulk_load_targets in bake mode
+_BAKED_TARGETS_SHAPEKEY_NAME = "baked-targets"
 
-with open(_MACRO_FILE, "r") as json_file:
-    _MACRO_CONFIG = json.load(json_file)
+# Threads used by bulk_load_targets to read and parse targets ahead of the shape key creation
+_PREFETCH_WORKERS = min(8, os.cpu_count() or 1)
 
-_GENERAL_PROPERTIES_DIR = ("/home/alfredo/.config/blender/4.0/scripts/addons/mpfb/entities/objectproperties"
-                           "/generalproperties/")
-_GENERAL_PROPERTIES = BlenderConfigSet.get_definitions_in_json_directory(_GENERAL_PROPERTIES_DIR)
-GeneralObjectProperties = BlenderConfigSet(_GENERAL_PROPERTIES, bpy.types.Object, prefix="GEN_")
+# float32 coordinate buffers for foreach_get/foreach_set, one per vertex count, reused across shape keys
+_COORDINATE_BUFFERS = dict()
 
 
 class TargetService:
@@ -62,12 +63,15 @@ class TargetService:
         raise RuntimeError("You should not instance TargetService. Use its static methods instead.")
 
     @staticmethod
-    def reapply_macro_details(basemesh, HumanObjectProperties, remove_zero_weight_targets=True):
+    def reapply_macro_details(basemesh, HumanObjectProperties, remove_zero_weight_targets=True, bake=False):
         macro_info = TargetService.get_macro_info_dict_from_basemesh(basemesh, HumanObjectProperties)
 
-        for target in TargetService.get_current_macro_targets(basemesh, decode_names=False):
-            # print("Setting target to 0", target)
-            basemesh.data.shape_keys.key_blocks[target].value = 0.0
+        if bake:
+            TargetService.bake_macro_details(basemesh, macro_info)
+            return
+
+        TargetService.set_target_values(
+            basemesh, {target: 0.0 for target in TargetService.get_current_macro_targets(basemesh, decode_names=False)})
 
         current_macro_targets = TargetService.get_current_macro_targets(basemesh, decode_names=True)
         required_macro_targets = TargetService.calculate_target_stack_from_macro_info_dict(macro_info)
@@ -76,26 +80,50 @@ class TargetService:
             requested = str(TargetService.macrodetail_filename_to_shapekey_name(target[0], encode_name=False)).strip()
 
             if requested not in current_macro_targets:
-                to_load = os.path.join(_TARGETS_DIR,
+                to_load = os.path.join(_config.targets_dir(),
                                        target[0] + ".target.gz")
                 name = TargetService.macrodetail_filename_to_shapekey_name(to_load, encode_name=True)
                 TargetService.load_target(basemesh, to_load, weight=0.0, name=name)
 
+        required_values = dict()
         for target in required_macro_targets:
             requested = str(TargetService.macrodetail_filename_to_shapekey_name(target[0], encode_name=True)).strip()
-            TargetService.set_target_value(basemesh, requested, target[1])
+            required_values[requested] = target[1]
+        TargetService.set_target_values(basemesh, required_values)
 
         if not basemesh.data.shape_keys:
             print("Basemesh has no shape keys at this point. This is somewhat surprising.")
 
         if remove_zero_weight_targets and basemesh.data.shape_keys:
             # print("Checking for targets to remove")
-            for shape_key in basemesh.data.shape_keys.key_blocks:
+            for shape_key in list(basemesh.data.shape_keys.key_blocks):
                 # print("Checking shape key", (shape_key.name, shape_key.value))
                 if str(shape_key.name).startswith("$md") and shape_key.value < 0.0001:
                     # print("Will remove macrodetail target", TargetService.decode_shapekey_name(shape_key.name))
                     basemesh.shape_key_remove(shape_key)
 
+    @staticmethod
+    def bake_macro_details(basemesh, macro_info):
+        """Apply the macro target stack of macro_info as the single shape key $md-baked, whose deltas are the
+        weighted sum of the stack (see MacroBakeCache), instead of one shape key per macro target. Any other
+        macro shape key is removed, since it would be applied twice."""
+        required_macro_targets = TargetService.calculate_target_stack_from_macro_info_dict(macro_info)
+        targets_dir = _config.targets_dir()
+        weighted_paths = [(os.path.join(targets_dir, target[0] + ".target.gz"), target[1])
+                          for target in required_macro_targets]
+
+        if basemesh.data.shape_keys:
+            for shape_key in list(basemesh.data.shape_keys.key_blocks):
+                if str(shape_key.name).startswith("$md") and shape_key.name != _BAKED_MACRO_SHAPEKEY_NAME:
+                    basemesh.shape_key_remove(shape_key)
+
+        indices, deltas = TargetService.get_macro_bake_cache().load(weighted_paths)
+        shape_key = TargetService.target_arrays_to_shape_key(indices, deltas, _BAKED_MACRO_SHAPEKEY_NAME, basemesh,
+                                                             reuse_existing=basemesh.data.shape_keys is not None)
+        shape_key.value = 1.0
+
+        return shape_key
+
     @staticmethod
     def set_target_value(blender_object, target_name, value, delete_target_on_zero=False):
         if blender_object is None or target_name is None or not target_name:
@@ -106,51 +134,214 @@ class TargetService:
         if keys is None or keys.key_blocks is None or len(keys.key_blocks) < 1:
             raise ValueError('Empty object or target')
 
-        for shape_key in keys.key_blocks:
-            if shape_key.name == target_name:
+        shape_key = TargetService.get_shape_key(blender_object, target_name)
+        if shape_key is not None:
+            shape_key.value = value
+            if value < 0.0001 and delete_target_on_zero:
+                blender_object.shape_key_remove(shape_key)
+
+    @staticmethod
+    def set_target_values(blender_object, target_values, delete_target_on_zero=False):
+        """set_target_value for every name to value item of target_values, with the shape keys looked up in the
+        name index of the object. Names without a shape key are ignored."""
+        if blender_object is None:
+            raise ValueError('Empty object or target')
+
+        keys = blender_object.data.shape_keys
+        if keys is None:
+            return
+
+        # Built once for the whole mapping, and valid until the removals below
+        index = TargetService.shape_key_index(blender_object)
+        key_blocks = keys.key_blocks
+
+        to_remove = []
+        for target_name, value in target_values.items():
+            position = index.get(target_name)
+            if position is not None:
+                shape_key = key_blocks[position]
                 shape_key.value = value
                 if value < 0.0001 and delete_target_on_zero:
-                    blender_object.shape_key_remove(shape_key)
+                    to_remove.append(shape_key)
+
+        for shape_key in to_remove:
+            blender_object.shape_key_remove(shape_key)
 
     @staticmethod
-    def bulk_load_targets(blender_object, target_stack, encode_target_names=False):
-        load_info = dict()
-        load_info["parsed_target_stack"] = []
+    def get_shape_key(blender_object, shape_key_name):
+        """Key block called shape_key_name, or None."""
+        keys = blender_object.data.shape_keys
+        if keys is None:
+            return None
+
+        return keys.key_blocks.get(shape_key_name)
+
+    @staticmethod
+    def shape_key_index(blender_object):
+        """Name to position of the shape keys of the object. Built from key_blocks on every call and never kept:
+        it is only valid until the next shape key is added or removed."""
+        keys = blender_object.data.shape_keys
+        if keys is None:
+            return dict()
+
+        return {shape_key.name: position for position, shape_key in enumerate(keys.key_blocks)}
+
+    @staticmethod
+    def bulk_load_targets(blender_object, target_stack, encode_target_names=False, prefetch_workers=None,
+                          bake=False):
+        """Load a stack of {"target", "value"} dicts as shape keys. Resolving, decompressing and parsing the
+        targets is pure I/O, so it runs in a pool of prefetch_workers threads (one thread disables the pool);
+        the shape keys are created afterwards on the calling thread, in the order of the stack.
+
+        With bake=True the weighted deltas of the whole stack are summed first and written once, straight into
+        the mesh when it has no shape keys and into the single shape key "baked-targets" otherwise. The targets
+        cannot be edited one by one afterwards."""
+        if prefetch_workers is None:
+            prefetch_workers = _PREFETCH_WORKERS
+
+        # Build the index before the threads start, so they never race to create it
+        TargetService.get_target_index()
+
+        if prefetch_workers > 1 and len(target_stack) > 1:
+            with ThreadPoolExecutor(max_workers=min(prefetch_workers, len(target_stack))) as executor:
+                parsed_target_stack = list(executor.map(TargetService._prefetch_target, target_stack))
+        else:
+            parsed_target_stack = [TargetService._prefetch_target(target) for target in target_stack]
+
+        for target, target_info in zip(target_stack, parsed_target_stack):
+            if target_info is None:
+                print("Skipping target because it could not be resolved to a path", target)
+
+        parsed_target_stack = [target_info for target_info in parsed_target_stack if target_info is not None]
+
+        if bake:
+            records = sum_targets((target_info["indices"], target_info["deltas"], target_info["value"])
+                                  for target_info in parsed_target_stack)
+            TargetService.write_baked_deltas(blender_object, records["index"], records["delta"])
+            return
+
+        for target_info in parsed_target_stack:
+
+            shape_key = TargetService.target_arrays_to_shape_key(
+                target_info["indices"], target_info["deltas"], target_info["shape_key_name"], blender_object)
+            shape_key.value = target_info["value"]
+
+    @staticmethod
+    def update_targets(blender_object, target_stack, prefetch_workers=None):
+        """Bring the target shape keys of an object already holding a previous stack to the given stack: shape keys
+        of targets that are already loaded only get their new value, the other targets are loaded with
+        bulk_load_targets and the targets missing from the stack are set to 0 (but kept, for the next stack).
+        Macro detail and baked shape keys are left alone."""
+        required_values = dict()
+        to_load = []
+        index = TargetService.shape_key_index(blender_object)
 
         for target in target_stack:
             target_full_path = TargetService.target_full_path(target["target"])
-            # print(f'target full path_ {target_full_path}')
-
-            if target_full_path:
-                parsed_target = dict()
-                parsed_target["full_path"] = target_full_path
-                parsed_target["name"] = target["target"]
-                parsed_target["value"] = target["value"]
-                if str(target_full_path).endswith(".gz"):
-                    with gzip.open(target_full_path, "rb") as gzip_file:
-                        raw_data = gzip_file.read()
-                        parsed_target["target_string"] = raw_data.decode('utf-8')
-                else:
-                    with open(target_full_path, "r") as target_file:
-                        parsed_target["target_string"] = target_file.read()
-                parsed_target["shape_key_name"] = TargetService.filename_to_shapekey_name(target_full_path)
-                load_info["parsed_target_stack"].append(parsed_target)
-            else:
+            if not target_full_path:
                 print("Skipping target because it could not be resolved to a path", target)
+                continue
 
-        for target_info in load_info["parsed_target_stack"]:
-            shape_key = TargetService.target_string_to_shape_key(
-                target_info["target_string"], target_info["shape_key_name"], blender_object)
-            shape_key.value = target_info["value"]
+            shape_key_name = TargetService.filename_to_shapekey_name(target_full_path)
+            if shape_key_name not in index and shape_key_name not in required_values:
+                to_load.append(target)
+            required_values[shape_key_name] = target["value"]
+
+        stale_values = {name: 0.0 for name in index if name not in required_values and
+                        not TargetService._is_reserved_shapekey_name(name)}
+        TargetService.set_target_values(blender_object, stale_values)
+
+        TargetService.bulk_load_targets(blender_object, to_load, prefetch_workers=prefetch_workers)
+        TargetService.set_target_values(blender_object, required_values)
+
+    @staticmethod
+    def _is_reserved_shapekey_name(shape_key_name):
+        return (shape_key_name.lower() == "basis" or shape_key_name.startswith("$md") or
+                shape_key_name == _BAKED_TARGETS_SHAPEKEY_NAME)
+
+    @staticmethod
+    def write_baked_deltas(blender_object, indices, deltas):
+        """Add the given deltas to the mesh vertices when the object has no shape keys, or store them in the
+        "baked-targets" shape key (replacing what it held) when it has."""
+        if blender_object.data.shape_keys:
+            shape_key = TargetService.target_arrays_to_shape_key(indices, deltas, _BAKED_TARGETS_SHAPEKEY_NAME,
+                                                                 blender_object, reuse_existing=True)
+            shape_key.value = 1.0
+            return shape_key
+
+        vertices = blender_object.data.vertices
+        buffer = TargetService._coordinate_buffer(len(vertices))
+        vertices.foreach_get('co', buffer)
+
+        coordinates = buffer.reshape(-1, 3)
+        coordinates[np.asarray(indices, dtype=np.intp)] += (np.asarray(deltas, dtype=np.float32) *
+                                                            np.float32(TargetService._scale_factor(blender_object)))
+
+        vertices.foreach_set('co', buffer)
+        blender_object.data.update()
+        return None
+
+    @staticmethod
+    def _prefetch_target(target):
+        target_full_path = TargetService.target_full_path(target["target"])
+
+        if not target_full_path:
+            return None
+
+        parsed_target = dict()
+        parsed_target["full_path"] = target_full_path
+        parsed_target["name"] = target["target"]
+        parsed_target["value"] = target["value"]
+        parsed_target["indices"], parsed_target["deltas"] = TargetService.load_target_arrays(target_full_path)
+        parsed_target["shape_key_name"] = TargetService.filename_to_shapekey_name(target_full_path)
+        return parsed_target
 
     @staticmethod
     def target_full_path(target_name):
-        targets_dir = _TARGETS_DIR
+        return TargetService.get_target_index().resolve(target_name)
 
-        for name in Path(targets_dir).rglob("*.target.gz"):
-            bn = str(os.path.basename(name)).lower()
-            if bn.startswith(str(target_name).lower()):
-                return str(name)
+    @staticmethod
+    def get_target_index():
+        """Index of the target files, loaded from its cache file or built on first use and kept for the session."""
+        global _TARGET_INDEX  # pylint: disable=W0603
+        if _TARGET_INDEX is None:
+            _TARGET_INDEX = TargetIndex.load_or_build(_config.targets_dir(),
+                                                      os.path.join(_config.cache_dir(), "target_index.json"))
+        return _TARGET_INDEX
+
+    @staticmethod
+    def get_target_cache():
+        global _TARGET_CACHE  # pylint: disable=W0603
+        if _TARGET_CACHE is None:
+            _TARGET_CACHE = TargetCache(os.path.join(_config.cache_dir(), "targets"))
+        return _TARGET_CACHE
+
+    @staticmethod
+    def get_macro_bake_cache():
+        global _MACRO_BAKE_CACHE  # pylint: disable=W0603
+        if _MACRO_BAKE_CACHE is None:
+            _MACRO_BAKE_CACHE = MacroBakeCache(TargetService.get_target_cache(),
+                                               os.path.join(_config.cache_dir(), "macros"))
+        return _MACRO_BAKE_CACHE
+
+    @staticmethod
+    def get_macro_config():
+        """Contents of the macro.json file of mpfb, read on first use."""
+        global _MACRO_CONFIG  # pylint: disable=W0603
+        if _MACRO_CONFIG is None:
+            with open(os.path.join(_config.targets_dir(), "macrodetails", "macro.json"), "r") as json_file:
+                _MACRO_CONFIG = json.load(json_file)
+        return _MACRO_CONFIG
+
+    @staticmethod
+    def get_general_object_properties():
+        """The general object properties of mpfb (scale_factor and friends), built on first use."""
+        global _GENERAL_OBJECT_PROPERTIES  # pylint: disable=W0603
+        if _GENERAL_OBJECT_PROPERTIES is None:
+            properties = BlenderConfigSet.get_definitions_in_json_directory(
+                _config.object_properties_dir("generalproperties"))
+            _GENERAL_OBJECT_PROPERTIES = BlenderConfigSet(properties, bpy.types.Object, prefix="GEN_")
+        return _GENERAL_OBJECT_PROPERTIES
 
     @staticmethod
     def load_target(blender_object, full_path, *, weight=0.0, name=None):
@@ -160,24 +351,13 @@ class TargetService:
             raise ValueError("Must specify a valid path - null or none was given")
         if not os.path.exists(full_path):
             raise IOError(full_path + " does not exist")
-        target_string = None
-        shape_key = None
 
         if name is None:
             name = TargetService.filename_to_shapekey_name(full_path)
 
-        if str(full_path).endswith(".gz"):
-
-            with gzip.open(full_path, "rb") as gzip_file:
-                raw_data = gzip_file.read()
-                target_string = raw_data.decode('utf-8')
-        else:
-            with open(full_path, "r") as target_file:
-                target_string = target_file.read()
-
-        if target_string is not None:
-            shape_key = TargetService.target_string_to_shape_key(target_string, name, blender_object)
-            shape_key.value = weight
+        indices, deltas = TargetService.load_target_arrays(full_path)
+        shape_key = TargetService.target_arrays_to_shape_key(indices, deltas, name, blender_object)
+        shape_key.value = weight
 
         if not TargetService.shapekey_is_target(shape_key.name) and shape_key.name not in _ODD_TARGET_NAMES:
             _ODD_TARGET_NAMES.append(shape_key.name)
@@ -218,29 +398,66 @@ class TargetService:
 
         return shape_key
 
+    @staticmethod
+    def load_target_arrays(full_path):
+        """(indices, deltas) of a target file: int32 vertex indices and float32 deltas in Blender axis order,
+        compiled once into the target cache and memory mapped from it afterwards."""
+        return TargetService.get_target_cache().load(full_path)
+
+    @staticmethod
+    def target_arrays_to_shape_key(indices, deltas, shape_key_name, blender_object, *, reuse_existing=False):
+        shape_key = TargetService.get_shape_key(blender_object, shape_key_name) if reuse_existing else None
+        if shape_key is None:
+            shape_key = TargetService.create_shape_key(blender_object, shape_key_name)
+
+        shape_key_info = {"name": shape_key_name, "indices": indices, "deltas": deltas}
+
+        TargetService._set_shape_key_coords_from_dict(blender_object, shape_key, shape_key_info)
+
+        return shape_key
+
     @staticmethod
     def _set_shape_key_coords_from_dict(blender_object, shape_key, info, *, scale_factor=None):
         if scale_factor is None:
-            scale_factor = GeneralObjectProperties.get_value("scale_factor", entity_reference=blender_object)
-            if not scale_factor or scale_factor < 0.0001:
-                scale_factor = 1.0
+            scale_factor = TargetService._scale_factor(blender_object)
 
         basis = shape_key.relative_key
 
         if not basis:
             raise ValueError("Object does not have a Basis shape key")
 
-        buffer = [0.0] * (len(shape_key.data) * 3)
+        buffer = TargetService._coordinate_buffer(len(shape_key.data))
         basis.data.foreach_get('co', buffer)
 
-        for i, x, y, z in info["vertices"]:
-            base = i * 3
-            buffer[base] += x * scale_factor
-            buffer[base + 1] += y * scale_factor
-            buffer[base + 2] += z * scale_factor
+        if "indices" in info:
+            indices = np.asarray(info["indices"], dtype=np.intp)
+            deltas = np.asarray(info["deltas"], dtype=np.float32)
+        else:
+            vertices = np.asarray(info["vertices"], dtype=np.float64).reshape(-1, 4)
+            indices = vertices[:, 0].astype(np.intp)
+            deltas = vertices[:, 1:]
+
+        # Vertex indices are unique within a target, so a plain fancy-indexed add is enough
+        coordinates = buffer.reshape(-1, 3)
+        coordinates[indices] += deltas * np.float32(scale_factor)
 
         shape_key.data.foreach_set('co', buffer)
 
+    @staticmethod
+    def _scale_factor(blender_object):
+        scale_factor = TargetService.get_general_object_properties().get_value("scale_factor",
+                                                                               entity_reference=blender_object)
+        if not scale_factor or scale_factor < 0.0001:
+            scale_factor = 1.0
+        return scale_factor
+
+    @staticmethod
+    def _coordinate_buffer(vertex_count):
+        buffer = _COORDINATE_BUFFERS.get(vertex_count)
+        if buffer is None:
+            buffer = _COORDINATE_BUFFERS[vertex_count] = np.empty(vertex_count * 3, dtype=np.float32)
+        return buffer
+
     @staticmethod
     def _target_string_to_shape_key_info(target_string, shape_key_name):
         info = dict()
@@ -274,35 +491,15 @@ class TargetService:
         shape_key = blender_object.shape_key_add(name=shape_key_name, from_mix=create_from_mix)
         shape_key.value = 1.0
 
-        shape_key_idx = blender_object.data.shape_keys.key_blocks.find(shape_key.name)
+        # New shape keys are appended, no need to search for it by name
+        shape_key_idx = len(blender_object.data.shape_keys.key_blocks) - 1
         blender_object.active_shape_key_index = shape_key_idx
 
         return shape_key
 
     @staticmethod
     def filename_to_shapekey_name(filename, *, macrodetail: bool | None = False, encode_name: bool | None = None):
-        name = os.path.basename(filename)
-
-        name = re.sub(r'\.gz$', "", name, flags=re.IGNORECASE)
-        name = re.sub(r'\.p?target$', "", name, flags=re.IGNORECASE)
-
-        if macrodetail is None:
-            from pathlib import Path
-            path_items = Path(os.path.abspath(filename)).parts
-            macrodetail = _MACRO_PATH_PATTERN in '/'.join(path_items).lower()
-
-        if macrodetail:
-            name = "macrodetail-" + name
-            if encode_name is None:
-                encode_name = True
-
-        if encode_name is None and len(name) > 60:
-            encode_name = True
-
-        if encode_name:
-            name = TargetService.encode_shapekey_name(name)
-
-        return name
+        return _shapekeyCodec.filename_to_shapekey_name(filename, macrodetail=macrodetail, encode_name=encode_name)
 
     @staticmethod
     def macrodetail_filename_to_shapekey_name(filename, encode_name: bool = False):
@@ -310,11 +507,27 @@ class TargetService:
 
     @staticmethod
     def calculate_target_stack_from_macro_info_dict(macro_info, cutoff=0.01):
+        """List of [target, weight] pairs for the given macro values. The stack only depends on the macro values
+        rounded to _MACRO_KEY_DECIMALS, and is memoized on them."""
         if macro_info is None:
             macro_info = TargetService.get_default_macro_info_dict()
 
+        key = tuple(round(float(macro_info[macro_name]), _MACRO_KEY_DECIMALS) for macro_name in _MACRO_NAMES)
+        races = tuple((race, round(float(value), _MACRO_KEY_DECIMALS)) for race, value in macro_info["race"].items())
+
+        return [list(target) for target in TargetService._cached_target_stack(key, races, cutoff)]
+
+    @staticmethod
+    @lru_cache(maxsize=_MACRO_STACK_CACHE_SIZE)
+    def _cached_target_stack(key, races, cutoff):
+        macro_info = dict(zip(_MACRO_NAMES, key))
+        macro_info["race"] = dict(races)
+        return tuple(tuple(target) for target in TargetService._calculate_target_stack(macro_info, cutoff))
+
+    @staticmethod
+    def _calculate_target_stack(macro_info, cutoff):
         components = dict()
-        for macro_name in ["gender", "age", "muscle", "weight", "proportions", "height", "cupsize", "firmness"]:
+        for macro_name in _MACRO_NAMES:
             value = macro_info[macro_name]
             components[macro_name] = TargetService._interpolate_macro_components(macro_name, value)
 
@@ -356,8 +569,8 @@ class TargetService:
                             # print("Appending universal-gender-age-muscle-weight target", [complete_name, weight])
                             targets.append([complete_name, weight])
                         else:
-                            print("Not appending universal-gender-age-muscle-weight target",
-                                  [complete_name, weight])
+                            _LOG.debug("Not appending universal-gender-age-muscle-weight target",
+                                       [complete_name, weight])
 
         # Targets for gender-age-muscle-weight-height
         for gender_component in components["gender"]:
@@ -381,8 +594,8 @@ class TargetService:
                                 # print("Appending gender-age-muscle-weight-height target", [complete_name, weight])
                                 targets.append([complete_name, weight])
                             else:
-                                print("Not appending gender-age-muscle-weight-height target",
-                                      [complete_name, weight])
+                                _LOG.debug("Not appending gender-age-muscle-weight-height target",
+                                           [complete_name, weight])
 
         # Targets for gender-age-muscle-weight-cupsize-firmness
         for gender_component in components["gender"]:
@@ -409,14 +622,11 @@ class TargetService:
                                     # print("Breast target", complete_name)
                                     if weight > cutoff:
                                         if "averagecup-averagefirmness" in complete_name or "_baby_" in complete_name or "-baby-" in complete_name:
-                                            print("Excluding forbidden breast modifier combination",
-                                                  complete_name)
-                                            print("Excluding forbidden breast modifier combination", complete_name)
+                                            _LOG.debug("Excluding forbidden breast modifier combination",
+                                                       complete_name)
                                         else:
-                                            print("Appending gender-age-muscle-weight-cupsize-firmness target",
-                                                  [complete_name, weight])
-                                            print("Appending gender-age-muscle-weight-cupsize-firmness target",
-                                                  [complete_name, weight])
+                                            _LOG.debug("Appending gender-age-muscle-weight-cupsize-firmness target",
+                                                       [complete_name, weight])
                                             targets.append([complete_name, weight])
                                     # else:
                                     #     print("Not appending gender-age-muscle-weight-cupsize-firmness target",
@@ -441,19 +651,19 @@ class TargetService:
                             weight = weight * weight_component[1]
                             weight = weight * proportions_component[1]
                             if weight > cutoff:
-                                print("Appending gender-age-muscle-weight-proportions target",
-                                      [complete_name, weight])
+                                _LOG.debug("Appending gender-age-muscle-weight-proportions target",
+                                           [complete_name, weight])
                                 targets.append([complete_name, weight])
                             else:
-                                print("Not appending gender-age-muscle-weight-proportions target",
-                                      [complete_name, weight])
+                                _LOG.debug("Not appending gender-age-muscle-weight-proportions target",
+                                           [complete_name, weight])
 
         return targets
 
     @staticmethod
     def _interpolate_macro_components(macro_name, value):
 
-        macrotarget = _MACRO_CONFIG["macrotargets"][macro_name]
+        macrotarget = TargetService.get_macro_config()["macrotargets"][macro_name]
         components = []
 
         for parts in macrotarget["parts"]:
@@ -515,27 +725,18 @@ class TargetService:
 
     @staticmethod
     def decode_shapekey_name(encoded_name):
-        name = str(encoded_name)
-        for code in _SHAPEKEY_ENCODING:
-            name = name.replace(code[1], code[0])
-        return name
+        return _shapekeyCodec.decode_shapekey_name(encoded_name)
 
     @staticmethod
     def encode_shapekey_name(original_name):
-        name = str(original_name)
-        for code in _SHAPEKEY_ENCODING:
-            name = name.replace(code[0], code[1])
-        return name
+        return _shapekeyCodec.encode_shapekey_name(original_name)
 
     @staticmethod
     def get_current_macro_targets(basemesh, decode_names=True):
         macro_targets = []
         if basemesh and basemesh.data.shape_keys and basemesh.data.shape_keys.key_blocks:
-            for shape_key in basemesh.data.shape_keys.key_blocks:
-                name = shape_key.name
-                if decode_names:
-                    name = TargetService.decode_shapekey_name(name)
-                if str(shape_key.name).startswith("$md"):
-                    macro_targets.append(name)
+            for name in basemesh.data.shape_keys.key_blocks.keys():
+                if name.startswith("$md"):
+                    macro_targets.append(TargetService.decode_shapekey_name(name) if decode_names else name)
 
         return macro_targets
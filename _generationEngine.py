@@ -0,0 +1,237 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ._batchSampler import BatchSampler
+from ._combinationStream import CombinationStream, mix64
+from ._mhmWriter import MhmWriter
+from ._packedDataset import PackedDataset
+from ._quasiRandomSampler import QuasiRandomSampler, centered_discrepancy
+from ._runManifest import RunManifest
+from ._splitAssigner import SplitAssigner
+
+# Forked workers inherit the plugin package from the parent. Spawned ones import it again, which fails inside
+# MakeHuman, where the plugin folder is not importable; there the GUI is limited to one worker. Fork is only used
+# on Linux: Windows has none, and forking a Qt process on macOS can crash the child (hence the spawn default there)
+FORK_WORKERS = sys.platform.startswith("linux")
+
+
+def derive_seed(seed, chunk):
+    """Seed of a single chunk. It depends only on the run seed and the chunk number, so the samples of a run are
+    the same no matter how many workers produce them."""
+    return mix64(mix64(seed) ^ chunk)
+
+
+class GenerationJob:
+    """Picklable description of a generation run, shared by the main process and the pool workers.
+
+    Step mode is selected by passing values (one list of values per choice), random mode by passing
+    modifiers, a list of (name, min, max, default, sigma) tuples, together with n. Random values are drawn a
+    chunk at a time by a BatchSampler, or by a QuasiRandomSampler covering the [min, max] box when sampling is
+    "lhs" or "sobol". With packed=True the run is stored as a single PackedDataset instead of
+    one .mhm file per human. Samples are spread over the splits by a SplitAssigner with the given split_ratios,
+    split_key and split_seed."""
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, path, macrodetails, seed, *, choices=None, values=None, modifiers=None, n=0,
+                 chunk_size=CHUNK_SIZE, packed=False, sampling="gaussian", split_ratios=None,
+                 split_key="parameters", split_seed=0):
+        self.path = path
+        self.macrodetails = macrodetails
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.packed = packed
+        self.sampling = sampling
+        self.is_random = modifiers is not None
+        self.values = None if values is None else [list(value) for value in values]
+        self.modifiers = None if modifiers is None else [list(modifier) for modifier in modifiers]
+
+        if self.is_random:
+            self.n = n
+            if sampling == "gaussian":
+                self.sampler = BatchSampler.from_modifiers(modifiers)
+            else:
+                self.sampler = QuasiRandomSampler.from_modifiers(sampling, modifiers, n, seed)
+            self.combinations = None
+            self.choices = [modifier[0] for modifier in modifiers]
+        else:
+            self.sampler = None
+            self.combinations = CombinationStream(values, seed)
+            self.n = len(self.combinations)
+            self.choices = list(choices)
+
+        # Not the run seed: regenerating a dataset with another seed must keep every human in its split
+        self.split_assigner = SplitAssigner(split_ratios, split_seed, split_key)
+
+    @classmethod
+    def from_spec(cls, spec):
+        return cls(spec["path"], spec["macrodetails"], spec["seed"], choices=spec["choices"], values=spec["values"],
+                   modifiers=spec["modifiers"], n=spec["n"], chunk_size=spec["chunk_size"], packed=spec["packed"],
+                   sampling=spec.get("sampling", "gaussian"), split_ratios=spec.get("split_ratios"),
+                   split_key=spec.get("split_key", "parameters"), split_seed=spec.get("split_seed", 0))
+
+    def to_spec(self):
+        """Json serializable arguments that rebuild this job with from_spec()."""
+        return {
+            "path": self.path,
+            "macrodetails": self.macrodetails,
+            "seed": self.seed,
+            "choices": self.choices,
+            "values": self.values,
+            "modifiers": self.modifiers,
+            "n": self.n,
+            "chunk_size": self.chunk_size,
+            "packed": self.packed,
+            "sampling": self.sampling,
+            "split_ratios": self.split_assigner.ratios,
+            "split_key": self.split_assigner.key,
+            "split_seed": self.split_assigner.seed
+        }
+
+    @property
+    def chunk_count(self):
+        return (self.n + self.chunk_size - 1) // self.chunk_size
+
+    def number(self, idx):
+        # Step files have always been numbered from 1, random ones from 0
+        return idx if self.is_random else idx + 1
+
+    def prepare_output(self):
+        self.__write_info_file()
+
+        if self.packed:
+            PackedDataset.create(self.path, self.choices, self.n, self.macrodetails, self.seed, self.number(0))
+            return
+
+        for split in self.split_assigner.directories():
+            os.makedirs(os.path.join(self.path, split), exist_ok=True)
+
+    def __write_info_file(self):
+        file = open(self.path + "/info.csv", "x")
+
+        text = "Parameters chosen\n"
+
+        for params in self.choices:
+            text += params + "\n"
+
+        file.write(text)
+        file.close()
+
+    def chunk_range(self, chunk):
+        start = chunk * self.chunk_size
+        return start, min(self.n, start + self.chunk_size)
+
+    def chunk_values(self, chunk):
+        """Rows of modifier values for every sample of a chunk, in the order of self.choices."""
+        start, stop = self.chunk_range(chunk)
+
+        if not self.is_random:
+            return self.combinations.take(np.arange(start, stop))
+
+        if self.sampling != "gaussian":
+            return self.sampler.sample(start, stop).tolist()
+
+        rng = np.random.default_rng(derive_seed(self.seed, chunk))
+        return self.sampler.sample(stop - start, rng).tolist()
+
+    def coverage(self, max_samples=2048):
+        """Centered L2 discrepancy of the first max_samples humans, once rescaled to the unit box spanned by the
+        parameter ranges. Lower is more uniform, and the values of different modes and runs are comparable."""
+        rows = []
+        for chunk in range(self.chunk_count):
+            if len(rows) >= max_samples:
+                break
+            rows.extend(self.chunk_values(chunk))
+        rows = np.asarray(rows[:max_samples], dtype=np.float64).reshape(-1, len(self.choices))
+
+        if self.is_random:
+            lowest = np.array([modifier[1] for modifier in self.modifiers], dtype=np.float64)
+            highest = np.array([modifier[2] for modifier in self.modifiers], dtype=np.float64)
+        else:
+            lowest = np.array([min(value) for value in self.values], dtype=np.float64)
+            highest = np.array([max(value) for value in self.values], dtype=np.float64)
+
+        width = np.where(highest > lowest, highest - lowest, 1.0)
+        return centered_discrepancy(np.clip((rows - lowest) / width, 0.0, 1.0), max_samples)
+
+
+def generate_chunk(job, chunk, exclusive=True):
+    """Write every human of a chunk. Top level so that it can be dispatched to a process pool. Resumed runs pass
+    exclusive=False, since a chunk that was interrupted may have left some of its files behind."""
+    start, stop = job.chunk_range(chunk)
+    chunk_values = job.chunk_values(chunk)
+    splits = job.split_assigner.assign(start, chunk_values)
+
+    if job.packed:
+        dataset = PackedDataset(job.path, mode="r+")
+        dataset.write_rows(start, chunk_values, splits)
+        dataset.flush()
+        return stop - start
+
+    with MhmWriter(job.macrodetails, job.choices, exclusive=exclusive) as writer:
+        for idx, values, split in zip(range(start, stop), chunk_values, splits):
+            writer.queue(job.path + "/" + split, job.number(idx), values)
+
+    return stop - start
+
+
+class GenerationEngine:
+    """Runs a GenerationJob chunk by chunk, either in the calling process or spread over a process pool.
+    File numbers and splits are functions of the sample index, so concurrent workers never collide.
+
+    Progress is recorded in a RunManifest, and resume() continues an interrupted run from it."""
+
+    def __init__(self, job, workers=1, progress=None, manifest=None):
+        self.job = job
+        self.workers = max(1, int(workers))
+        self.progress = progress
+        self.manifest = manifest
+
+    @classmethod
+    def resume(cls, path, workers=1, progress=None):
+        manifest = RunManifest.load(path)
+        # The run directory may have been moved since the run was started
+        return cls(GenerationJob.from_spec(dict(manifest.spec, path=path)), workers, progress, manifest)
+
+    def run(self):
+        resuming = self.manifest is not None
+        if not resuming:
+            self.job.prepare_output()
+            self.manifest = RunManifest.create(self.job.path, self.job.to_spec())
+
+        chunks = [chunk for chunk in range(self.job.chunk_count) if not self.manifest.is_done(chunk)]
+        done = self.job.n - sum(self.__chunk_length(chunk) for chunk in chunks)
+
+        try:
+            if self.workers == 1:
+                for chunk in chunks:
+                    done += generate_chunk(self.job, chunk, not resuming)
+                    self.manifest.mark_done(chunk)
+                    self.__report(done)
+            else:
+                context = multiprocessing.get_context("fork") if FORK_WORKERS else None
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+                    futures = {executor.submit(generate_chunk, self.job, chunk, not resuming): chunk
+                               for chunk in chunks}
+                    for future in as_completed(futures):
+                        done += future.result()
+                        self.manifest.mark_done(futures[future])
+                        self.__report(done)
+
+            self.manifest.finished = True
+        finally:
+            self.manifest.flush()
+
+        return done
+
+    def __chunk_length(self, chunk):
+        start, stop = self.job.chunk_range(chunk)
+        return stop - start
+
+    def __report(self, done):
+        if self.progress is not None:
+            self.progress(done, self.job.n)
@@ -11,8 +11,10 @@ from core import G
 
 class ImageGenerator:
 
-    def __init__(self, path, resolution_string, standard_resolution):
+    def __init__(self, path, resolution_string, standard_resolution, incremental=True):
         self.path = path
+        # Keep one basemesh for the whole run and retarget it to every human, instead of building a new one
+        self.incremental = incremental
         self.width, self.height = self.get_resolution_from_string(resolution_string)
         self.standard_resolution = standard_resolution
         self.__initialize_settings()
@@ -24,6 +26,11 @@ class ImageGenerator:
         self.settings["bodypart_deep_search"] = False
         self.settings["clothes_deep_search"] = False
         self.settings["scale"] = 0.1
+        # Images never need the individual targets, so the phenotype is baked into one shape key. The face targets
+        # are only baked for basemeshes built from scratch: a baked stack has to be reloaded and summed again for
+        # every human, while a retargeted basemesh keeps one shape key per target and only updates their weights
+        self.settings["bake_macro_details"] = True
+        self.settings["bake_targets"] = not self.incremental
 
     @staticmethod
     def __set_camera_parameters():
@@ -72,11 +79,16 @@ class ImageGenerator:
         self.set_image_format()
 
         progress = 1
+        base_mesh = None
+
+        log.message(f"incremental: {self.incremental}, face targets "
+                    f"{'baked per human' if self.settings['bake_targets'] else 'updated by weight'}")
 
         for path in self.path:
             for filename in os.listdir(path):
                 if filename.endswith('.mhm'):
-                    base_mesh = MhmImporter.deserialize_from_mhm(path + "/" + filename, self.settings)
+                    base_mesh = MhmImporter.deserialize_from_mhm(path + "/" + filename, self.settings,
+                                                                 base_mesh if self.incremental else None)
                     bpy.context.view_layer.objects.active = base_mesh
                     base_mesh.select_set(True)
 
@@ -87,20 +99,26 @@ class ImageGenerator:
                     # obj_to_remove = bpy.data.objects[filename.split(".")[0]]
                     # bpy.data.objects.remove(obj_to_remove, do_unlink=True)
 
-                    obj_to_remove = bpy.data.objects[filename.split(".")[0] + ".body"]
-                    bpy.data.objects.remove(obj_to_remove, do_unlink=True)
-
-                    bpy.ops.outliner.orphans_purge()
+                    if not self.incremental:
+                        self.__remove_base_mesh(base_mesh)
 
                     G.app.progress(progress / self.elements_to_process)
                     G.app.statusPersist(f'{progress}/{self.elements_to_process}')
                     progress += 1
 
+        if self.incremental and base_mesh is not None:
+            self.__remove_base_mesh(base_mesh)
+
         G.app.progress(0)
         G.app.statusPersist("")
 
         log.message(f"Execution time: {time.time() - start} s")
 
+    @staticmethod
+    def __remove_base_mesh(base_mesh):
+        bpy.data.objects.remove(base_mesh, do_unlink=True)
+        bpy.ops.outliner.orphans_purge()
+
     def generate_images_from_obj(self):
 
         bpy.ops.preferences.addon_enable(module="io_scene_obj")
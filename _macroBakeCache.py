@@ -0,0 +1,62 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from ._targetCache import sum_targets, write_records
+
+
+class MacroBakeCache:
+    """Weighted sums of macro targets, so a whole macro target stack can be applied as a single shape key.
+
+    A stack is given as (full path, weight) pairs and baked into one array of TARGET_DTYPE records holding every
+    vertex touched by any of the targets, with the weighted deltas summed. Baked stacks are kept in memory (the
+    max_entries most recently used ones) and, when a cache_dir is given, saved as .npy files named after a hash of
+    the paths, their size and mtime and the weights, so later sessions with the same phenotypes skip the bake."""
+
+    def __init__(self, target_cache, cache_dir=None, max_entries=32):
+        self.target_cache = target_cache
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.baked = OrderedDict()
+
+    @staticmethod
+    def key(weighted_paths):
+        parts = []
+        for full_path, weight in weighted_paths:
+            stat = os.stat(full_path)
+            parts.append("|".join([os.path.abspath(full_path), str(stat.st_size), str(stat.st_mtime_ns),
+                                   repr(float(weight))]))
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def load(self, weighted_paths):
+        """(indices, deltas) of the baked stack, in the same form as TargetCache.load."""
+        records = self.load_records(weighted_paths)
+        return records["index"], records["delta"]
+
+    def load_records(self, weighted_paths):
+        weighted_paths = list(weighted_paths)
+        key = self.key(weighted_paths)
+
+        if key in self.baked:
+            self.baked.move_to_end(key)
+            return self.baked[key]
+
+        cache_file = os.path.join(self.cache_dir, key + ".npy") if self.cache_dir else None
+
+        if cache_file is not None and os.path.exists(cache_file):
+            records = np.load(cache_file)
+        else:
+            records = self.bake(weighted_paths)
+            if cache_file is not None:
+                write_records(cache_file, records)
+
+        self.baked[key] = records
+        while len(self.baked) > self.max_entries:
+            self.baked.popitem(last=False)
+
+        return records
+
+    def bake(self, weighted_paths):
+        return sum_targets(self.target_cache.load(full_path) + (weight,) for full_path, weight in weighted_paths)
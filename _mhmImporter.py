@@ -1,24 +1,19 @@
-import os
-import re
 import random
 
 import bpy
-from pathlib import Path
 
+from . import _config
 from ._blenderconfigset import BlenderConfigSet
 from ._customTargetService import TargetService
+from . import _mhmParser
 from ._objectservice import ObjectService
 
-_OPPOSITES = [
-    "decr-incr",
-    "down-up",
-    "in-out",
-    "backward-forward",
-    "concave-convex",
-    "compress-uncompress",
-    "square-round",
-    "pointed-triangle"
-]
+# Scaled basemeshes right after the OBJ import, by (scale, excluded vertex groups), copied for every new human.
+# They are not linked to any scene and have a fake user, so that orphans_purge leaves them alone
+_BASEMESH_TEMPLATES = dict()
+
+# The human properties of mpfb, built on first use and shared by every human of the process
+_HUMAN_OBJECT_PROPERTIES = None
 
 
 class MhmImporter:
@@ -36,44 +31,29 @@ class MhmImporter:
             "subdiv_levels": 1,
             "load_clothes": True,
             "override_skin_model": "PRESET",
-            "override_rig": "PRESET"
+            "override_rig": "PRESET",
+            "prefetch_workers": None,
+            "bake_macro_details": False,
+            "bake_targets": False,
+            "basemesh_template": True
         }
 
         return default_settings
 
     @staticmethod
-    def deserialize_from_mhm(filename, deserialization_settings):
-        if not os.path.exists(filename):
-            raise IOError(str(filename) + " does not exist")
-
-        mhm_string = Path(filename).read_text()
-
-        human_info = MhmImporter._create_default_human_info_dict()
-        name = None
-
-        for line in mhm_string.splitlines():
-            if line.startswith("modifier"):
-                MhmImporter._parse_mhm_modifier_line(human_info, line)
-            else:
-                if line.startswith("skinMaterial"):
-                    skinLine = line.replace("skinMaterial skins/", "")
-                    skinLine = skinLine.replace("skinMaterial", "")
-                    human_info["skin_mhmat"] = skinLine
-                    human_info["skin_material_type"] = "ENHANCED_SSS"
-                if line.startswith("name "):
-                    name = line.replace("name ", "")
+    def deserialize_from_mhm(filename, deserialization_settings, basemesh=None):
+        """Basemesh of the human described by an .mhm file. When a basemesh of a previous human is given it is
+        retargeted to the new one (see retarget_from_dict) instead of building a new basemesh."""
+        human_info = MhmImporter.parse_mhm_file(filename)
 
-        if "rig" not in human_info or not human_info["rig"]:
-            human_info["rig"] = "default"
+        if basemesh is not None:
+            return MhmImporter.retarget_from_dict(basemesh, human_info, deserialization_settings)
 
-        if not name:
-            match = re.search(r'.*([^/\\]*)\.(mhm|MHM)$', filename)
-            name = match.group(1)
+        return MhmImporter.deserialize_from_dict(human_info, deserialization_settings)
 
-        human_info["name"] = name
-        basemesh = MhmImporter.deserialize_from_dict(human_info, deserialization_settings)
-
-        return basemesh
+    @staticmethod
+    def parse_mhm_file(filename):
+        return _mhmParser.parse_mhm_file(filename)
 
     @staticmethod
     def deserialize_from_dict(human_info, deserialization_settings):
@@ -95,7 +75,9 @@ class MhmImporter:
 
         macro_detail_dict = human_info["phenotype"]
         basemesh = MhmImporter.create_human(mask_helpers, detailed_helpers, extra_vertex_groups, feet_on_ground, scale,
-                                            macro_detail_dict)
+                                            macro_detail_dict,
+                                            deserialization_settings.get("bake_macro_details", False),
+                                            deserialization_settings.get("basemesh_template", True))
 
         if "name" in human_info and human_info["name"]:
             basemesh.name = human_info["name"] + ".body"
@@ -105,7 +87,8 @@ class MhmImporter:
             modifier.levels = 0
             modifier.render_levels = subdiv_levels
 
-        MhmImporter._load_targets(human_info, basemesh)
+        MhmImporter._load_targets(human_info, basemesh, deserialization_settings.get("prefetch_workers"),
+                                  deserialization_settings.get("bake_targets", False))
 
         if feet_on_ground:
             lowest_point = MhmImporter.get_lowest_point(basemesh)
@@ -117,37 +100,65 @@ class MhmImporter:
         return basemesh
 
     @staticmethod
-    def _load_targets(human_info, basemesh):
+    def retarget_from_dict(basemesh, human_info, deserialization_settings):
+        """Turn a basemesh built by deserialize_from_dict for a previous human into the human of human_info. Only
+        the targets the basemesh does not hold yet are loaded, every other target just gets its new weight, so a
+        series of humans sharing a phenotype costs one basemesh and a weight update per human. With bake_targets the
+        whole stack is loaded and summed again instead, as for a new basemesh."""
+        if human_info is None or len(human_info.keys()) < 1:
+            raise ValueError('The provided dict does not seem to be a valid human_info')
+
+        HumanObjectProperties = MhmImporter._get_human_object_properties()
+        MhmImporter._set_macro_details(basemesh, HumanObjectProperties, human_info["phenotype"])
+
+        # Unused macro targets are kept at weight 0, the next human may need them again
+        TargetService.reapply_macro_details(basemesh, HumanObjectProperties, remove_zero_weight_targets=False,
+                                            bake=deserialization_settings.get("bake_macro_details", False))
+
+        if "name" in human_info and human_info["name"]:
+            basemesh.name = human_info["name"] + ".body"
+
+        targets = human_info.get("targets") or []
+        if deserialization_settings.get("bake_targets", False):
+            TargetService.bulk_load_targets(basemesh, targets, bake=True,
+                                            prefetch_workers=deserialization_settings.get("prefetch_workers"))
+        else:
+            TargetService.update_targets(basemesh, targets, deserialization_settings.get("prefetch_workers"))
+
+        if deserialization_settings["feet_on_ground"]:
+            # The basemesh already stands on the ground of the previous human, move it by the difference
+            lowest_point = MhmImporter.get_lowest_point(basemesh)
+            basemesh.location = (0.0, 0.0, -lowest_point)
+            ObjectService.activate_blender_object(basemesh, deselect_all=True)
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+
+        return basemesh
+
+    @staticmethod
+    def _load_targets(human_info, basemesh, prefetch_workers=None, bake=False):
         if "targets" not in human_info:
             return
 
-        TargetService.bulk_load_targets(basemesh, human_info["targets"])
+        TargetService.bulk_load_targets(basemesh, human_info["targets"], prefetch_workers=prefetch_workers,
+                                        bake=bake)
 
     @staticmethod
     def create_human(mask_helpers=True, detailed_helpers=True, extra_vertex_groups=True, feet_on_ground=True, scale=0.1,
-                     macro_detail_dict=None):
+                     macro_detail_dict=None, bake_macro_details=False, use_template=True):
 
         exclude = []
 
         ObjectService.deselect_and_deactivate_all()
-        basemesh = ObjectService.load_base_mesh(context=bpy.context, scale_factor=scale, load_vertex_groups=True,
-                                                exclude_vertex_groups=exclude)
+        if use_template:
+            basemesh = MhmImporter.load_base_mesh_from_template(scale, exclude)
+        else:
+            basemesh = ObjectService.load_base_mesh(context=bpy.context, scale_factor=scale, load_vertex_groups=True,
+                                                    exclude_vertex_groups=exclude)
 
-        _ROOT = "/home/alfredo/.config/blender/4.0/scripts/addons/mpfb/entities/objectproperties/"
-        _HUMAN_PROPERTIES_DIR = os.path.join(_ROOT, "humanproperties")
-        _HUMAN_PROPERTIES = BlenderConfigSet.get_definitions_in_json_directory(_HUMAN_PROPERTIES_DIR)
-        HumanObjectProperties = BlenderConfigSet(_HUMAN_PROPERTIES, bpy.types.Object, prefix="HUM_")
-
-        for key in macro_detail_dict.keys():
-            name = str(key)
-            if name != "race":
-                HumanObjectProperties.set_value(name, macro_detail_dict[key], entity_reference=basemesh)
-
-        for key in macro_detail_dict["race"].keys():
-            name = str(key)
-            HumanObjectProperties.set_value(name, macro_detail_dict["race"][key], entity_reference=basemesh)
+        HumanObjectProperties = MhmImporter._get_human_object_properties()
+        MhmImporter._set_macro_details(basemesh, HumanObjectProperties, macro_detail_dict)
 
-        TargetService.reapply_macro_details(basemesh, HumanObjectProperties)
+        TargetService.reapply_macro_details(basemesh, HumanObjectProperties, bake=bake_macro_details)
 
         if mask_helpers:
             modifier = basemesh.modifiers.new("Hide helpers", 'MASK')
@@ -164,6 +175,63 @@ class MhmImporter:
 
         return basemesh
 
+    @staticmethod
+    def load_base_mesh_from_template(scale, exclude_vertex_groups=None):
+        """Same basemesh as ObjectService.load_base_mesh, selected and active, but only the first one of a session
+        is imported from base.obj: it is kept as a template and every later one is a copy of its object and mesh."""
+        key = (scale, tuple(exclude_vertex_groups or []))
+        template = _BASEMESH_TEMPLATES.get(key)
+
+        if template is not None:
+            try:
+                template.name
+            except ReferenceError:
+                # The template was deleted, e.g. by loading another blend file
+                template = None
+
+        if template is None:
+            basemesh = ObjectService.load_base_mesh(context=bpy.context, scale_factor=scale, load_vertex_groups=True,
+                                                    exclude_vertex_groups=exclude_vertex_groups)
+            template = basemesh.copy()
+            template.data = basemesh.data.copy()
+            template.use_fake_user = True
+            template.data.use_fake_user = True
+            _BASEMESH_TEMPLATES[key] = template
+            return basemesh
+
+        basemesh = template.copy()
+        basemesh.data = template.data.copy()
+        basemesh.use_fake_user = False
+        basemesh.data.use_fake_user = False
+        basemesh.name = "Human"
+
+        bpy.context.collection.objects.link(basemesh)
+        ObjectService.activate_blender_object(basemesh, deselect_all=True)
+
+        return basemesh
+
+    @staticmethod
+    def _get_human_object_properties():
+        """The BlenderConfigSet of the human properties of mpfb (see _config for their location). Building it
+        reads every json definition and registers every property on bpy.types.Object, so it is done once."""
+        global _HUMAN_OBJECT_PROPERTIES  # pylint: disable=W0603
+        if _HUMAN_OBJECT_PROPERTIES is None:
+            properties = BlenderConfigSet.get_definitions_in_json_directory(
+                _config.object_properties_dir("humanproperties"))
+            _HUMAN_OBJECT_PROPERTIES = BlenderConfigSet(properties, bpy.types.Object, prefix="HUM_")
+        return _HUMAN_OBJECT_PROPERTIES
+
+    @staticmethod
+    def _set_macro_details(basemesh, HumanObjectProperties, macro_detail_dict):
+        for key in macro_detail_dict.keys():
+            name = str(key)
+            if name != "race":
+                HumanObjectProperties.set_value(name, macro_detail_dict[key], entity_reference=basemesh)
+
+        for key in macro_detail_dict["race"].keys():
+            name = str(key)
+            HumanObjectProperties.set_value(name, macro_detail_dict["race"][key], entity_reference=basemesh)
+
     @staticmethod
     def get_lowest_point(basemesh, take_shape_keys_into_account=True):
         lowest_point = 1000.0
@@ -188,101 +256,13 @@ class MhmImporter:
 
         return lowest_point
 
-    @staticmethod
-    def _parse_mhm_modifier_line(human_info, line):
-        line = str(line).replace("modifier ", "")
-
-        for simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height", "BodyProportions", "Asian", "African",
-                             "Caucasian", "BreastSize", "BreastFirmness"]:
-            macroline = line
-            macroline = macroline.replace("breast/", "")
-            macroline = macroline.replace("macrodetails/", "")
-            macroline = macroline.replace("macrodetails-height/", "")
-            macroline = macroline.replace("macrodetails-universal/", "")
-            macroline = macroline.replace("macrodetails-proportions/", "")
-
-            if macroline.startswith(simple_macro + " "):
-                target, weight = macroline.split(" ", 1)
-                weight = float(weight)
-
-                if simple_macro in ["Asian", "African", "Caucasian"]:
-                    human_info["phenotype"]["race"][simple_macro.lower()] = weight
-                    return
-                if simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height"]:
-                    human_info["phenotype"][simple_macro.lower()] = weight
-                    return
-                if simple_macro == "BodyProportions":
-                    human_info["phenotype"]["proportions"] = weight
-                    return
-
-        target = MhmImporter.translate_mhm_target_line_to_target_fragment(line)
-        if not "targets" in human_info or not human_info["targets"]:
-            human_info["targets"] = []
-        human_info["targets"].append(target)
-
-    @staticmethod
-    def translate_mhm_target_line_to_target_fragment(mhm_line):
-        if mhm_line.startswith("modifier "):
-            mhm_line.replace("modifier ", "")
-        name, weight = mhm_line.split(" ", 1)
-
-        weight = float(weight)
-        for opposite in _OPPOSITES:
-            negative, positive = opposite.split("-", 1)
-            mhm_term = negative + "|" + positive
-
-            if mhm_term in mhm_line:
-
-                if weight < 0.0:
-                    name = name.replace(mhm_term, negative)
-                    weight = -weight
-                else:
-                    name = name.replace(mhm_term, positive)
-        if "/" in name:
-            dirname, name = name.split("/", 1)
-
-        return {"target": name, "value": weight}
-
     @staticmethod
     def _create_default_human_info_dict():
-        human_info = dict()
-        human_info["phenotype"] = MhmImporter.get_default_macro_info_dict()
-        human_info["rig"] = ""
-        human_info["eyes"] = ""
-        human_info["eyebrows"] = ""
-        human_info["eyelashes"] = ""
-        human_info["tongue"] = ""
-        human_info["teeth"] = ""
-        human_info["hair"] = ""
-        human_info["proxy"] = ""
-        human_info["tongue"] = ""
-        human_info["targets"] = []
-        human_info["clothes"] = []
-        human_info["skin_mhmat"] = ""
-        human_info["skin_material_type"] = "NONE"
-        human_info["eyes_material_type"] = "MAKESKIN"
-        human_info["skin_material_settings"] = dict()
-        human_info["eyes_material_settings"] = dict()
-        return human_info
+        return _mhmParser.create_default_human_info_dict()
 
     @staticmethod
     def get_default_macro_info_dict():
-        return {
-            "gender": 0.5,
-            "age": 0.5,
-            "muscle": 0.5,
-            "weight": 0.5,
-            "proportions": 0.5,
-            "height": 0.5,
-            "cupsize": 0.5,
-            "firmness": 0.5,
-            "race": {
-                "asian": 0.33,
-                "caucasian": 0.33,
-                "african": 0.33
-            }
-        }
-
+        return _mhmParser.get_default_macro_info_dict()
 
 if __name__ == '__main__':
     base_mesh = MhmImporter.deserialize_from_mhm("/home/alfredo/Documenti/makehuman/v1py3/models/1/human_1.mhm",
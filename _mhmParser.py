@@ -0,0 +1,165 @@
+"""Single pass parser of .mhm files into the human_info dicts used by MhmImporter, without bpy.
+
+Every modifier name is turned once into a rule (which phenotype value it sets, or which target it drives for
+negative and positive weights) and the rules are cached, so parsing a file is one dictionary lookup per line.
+The results are the same as the line by line functions MhmImporter used before (checked by
+benchmarks/bench_mhm_parser.py), quirks included: BreastSize and BreastFirmness are loaded as targets rather than
+phenotype values."""
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+OPPOSITES = [
+    "decr-incr",
+    "down-up",
+    "in-out",
+    "backward-forward",
+    "concave-convex",
+    "compress-uncompress",
+    "square-round",
+    "pointed-triangle"
+]
+
+# Macro modifier names, once the folder prefixes below are removed, and the phenotype value they set
+PHENOTYPE_MACROS = {
+    "Age": "age",
+    "Gender": "gender",
+    "Muscle": "muscle",
+    "Weight": "weight",
+    "Height": "height",
+    "BodyProportions": "proportions"
+}
+RACE_MACROS = {
+    "Asian": "asian",
+    "African": "african",
+    "Caucasian": "caucasian"
+}
+MACRO_PREFIXES = ["breast/", "macrodetails/", "macrodetails-height/", "macrodetails-universal/",
+                  "macrodetails-proportions/"]
+
+_OPPOSITE_TERMS = [(negative + "|" + positive, negative, positive)
+                   for negative, positive in (opposite.split("-", 1) for opposite in OPPOSITES)]
+_NAME_FALLBACK = re.compile(r'.*([^/\\]*)\.(mhm|MHM)$')
+
+
+def get_default_macro_info_dict():
+    return {
+        "gender": 0.5,
+        "age": 0.5,
+        "muscle": 0.5,
+        "weight": 0.5,
+        "proportions": 0.5,
+        "height": 0.5,
+        "cupsize": 0.5,
+        "firmness": 0.5,
+        "race": {
+            "asian": 0.33,
+            "caucasian": 0.33,
+            "african": 0.33
+        }
+    }
+
+
+def create_default_human_info_dict():
+    human_info = dict()
+    human_info["phenotype"] = get_default_macro_info_dict()
+    human_info["rig"] = ""
+    human_info["eyes"] = ""
+    human_info["eyebrows"] = ""
+    human_info["eyelashes"] = ""
+    human_info["tongue"] = ""
+    human_info["teeth"] = ""
+    human_info["hair"] = ""
+    human_info["proxy"] = ""
+    human_info["tongue"] = ""
+    human_info["targets"] = []
+    human_info["clothes"] = []
+    human_info["skin_mhmat"] = ""
+    human_info["skin_material_type"] = "NONE"
+    human_info["eyes_material_type"] = "MAKESKIN"
+    human_info["skin_material_settings"] = dict()
+    human_info["eyes_material_settings"] = dict()
+    return human_info
+
+
+@lru_cache(maxsize=None)
+def modifier_rule(name):
+    """("race", key), ("phenotype", key) or ("target", negative target, flip negative weights, positive target)
+    for a modifier name as written in an .mhm file, e.g. "nose/nose-trans-up|down"."""
+    macro_name = name
+    for prefix in MACRO_PREFIXES:
+        macro_name = macro_name.replace(prefix, "")
+
+    if macro_name in RACE_MACROS:
+        return "race", RACE_MACROS[macro_name]
+    if macro_name in PHENOTYPE_MACROS:
+        return "phenotype", PHENOTYPE_MACROS[macro_name]
+
+    negative_target, flip = _target_name(name, negative=True)
+    positive_target, _ = _target_name(name, negative=False)
+    return "target", negative_target, flip, positive_target
+
+
+def _target_name(name, negative):
+    # The former MhmImporter.translate_mhm_target_line_to_target_fragment, for a weight of the given sign
+    flip = False
+
+    for term, negative_name, positive_name in _OPPOSITE_TERMS:
+        if term in name:
+            if negative and not flip:
+                name = name.replace(term, negative_name)
+                flip = True
+            else:
+                name = name.replace(term, positive_name)
+
+    if "/" in name:
+        name = name.split("/", 1)[1]
+
+    return name, flip
+
+
+def parse_mhm_string(mhm_string, filename=""):
+    human_info = create_default_human_info_dict()
+    phenotype = human_info["phenotype"]
+    targets = human_info["targets"]
+    name = None
+
+    for line in mhm_string.splitlines():
+        if line.startswith("modifier"):
+            modifier_name, weight = line.replace("modifier ", "").split(" ", 1)
+            weight = float(weight)
+            rule = modifier_rule(modifier_name)
+
+            if rule[0] == "target":
+                if weight < 0.0:
+                    targets.append({"target": rule[1], "value": -weight if rule[2] else weight})
+                else:
+                    targets.append({"target": rule[3], "value": weight})
+            elif rule[0] == "race":
+                phenotype["race"][rule[1]] = weight
+            else:
+                phenotype[rule[1]] = weight
+        else:
+            if line.startswith("skinMaterial"):
+                human_info["skin_mhmat"] = line.replace("skinMaterial skins/", "").replace("skinMaterial", "")
+                human_info["skin_material_type"] = "ENHANCED_SSS"
+            if line.startswith("name "):
+                name = line.replace("name ", "")
+
+    if "rig" not in human_info or not human_info["rig"]:
+        human_info["rig"] = "default"
+
+    if not name:
+        name = _NAME_FALLBACK.search(filename).group(1)
+
+    human_info["name"] = name
+
+    return human_info
+
+
+def parse_mhm_file(filename):
+    if not os.path.exists(filename):
+        raise IOError(str(filename) + " does not exist")
+
+    return parse_mhm_string(Path(filename).read_text(), filename)
@@ -0,0 +1,98 @@
+import os
+import re
+
+_INDENT = re.compile(r"\n\s+")
+
+
+class MhmWriter:
+    """Writes generated humans as .mhm files.
+
+    Everything that does not change between humans (header, standard parameters, suffix and, when the choices
+    are known up front, the whole modifier block) is rendered once per writer, so a file costs a single string
+    format. Files queued with queue() are flushed in batches, each with one os.write through a pool of open
+    directory handles, one per split directory. Existing files are only overwritten when exclusive is False."""
+
+    VERSION = "version v1.2.0"
+    CAMERA = "camera 0.0 0.0 0.0 0.0 0.0 1.225"
+    STANDARD_PARAMETERS = """modifier macrodetails-universal/Muscle 0.500000
+        modifier macrodetails-height/Height 0.500000
+        modifier macrodetails-proportions/BodyProportions 0.500000"""
+    SUFFIX = """eyes HighPolyEyes 2c12f43b-1303-432c-b7ce-d78346baf2e6
+        clothesHideFaces True
+        skinMaterial skins/default.mhmat
+        material HighPolyEyes 2c12f43b-1303-432c-b7ce-d78346baf2e6 eyes/materials/brown.mhmat
+        subdivide False"""
+
+    PRECISION = 6
+    BATCH_SIZE = 256
+
+    def __init__(self, macrodetails, choices=None, precision=PRECISION, batch_size=BATCH_SIZE, exclusive=True):
+        self.macrodetails = macrodetails
+        self.batch_size = batch_size
+        self.exclusive = exclusive
+
+        self.prefix = self.VERSION + "\nname human_"
+        self.header = ("\n" + self.CAMERA + "\n" + macrodetails + "\n" + _INDENT.sub("\n", self.STANDARD_PARAMETERS)
+                       + "\n")
+        self.suffix = _INDENT.sub("\n", self.SUFFIX)
+
+        value_format = "%." + str(precision) + "f\n"
+        self.line_format = "modifier %s " + value_format
+        self.template = None
+        if choices is not None:
+            self.template = "".join(["modifier " + choice.replace("%", "%%") + " " + value_format
+                                     for choice in choices])
+
+        self.pending = []
+        self.directories = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def render(self, number, parameters):
+        body = "".join([self.line_format % (name, value) for name, value in parameters])
+        return self.prefix + str(number) + self.header + body + self.suffix
+
+    def render_values(self, number, values):
+        """Render a human whose values are given in the order of the choices passed to the constructor."""
+        return self.prefix + str(number) + self.header + self.template % tuple(values) + self.suffix
+
+    def write(self, path, number, parameters):
+        self.__write_file(path, number, self.render(number, parameters))
+
+    def queue(self, path, number, values):
+        self.pending.append((path, number, self.render_values(number, values)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for path, number, text in self.pending:
+            self.__write_file(path, number, text)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        for directory in self.directories.values():
+            os.close(directory)
+        self.directories = dict()
+
+    def __write_file(self, path, number, text):
+        file_name = "human_" + str(number) + ".mhm"
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        flags |= os.O_EXCL if self.exclusive else os.O_TRUNC
+
+        if os.open in os.supports_dir_fd:
+            directory = self.directories.get(path)
+            if directory is None:
+                directory = self.directories[path] = os.open(path, os.O_RDONLY)
+            file = os.open(file_name, flags, 0o666, dir_fd=directory)
+        else:
+            file = os.open(os.path.join(path, file_name), flags, 0o666)
+
+        try:
+            os.write(file, text.encode("utf-8"))
+        finally:
+            os.close(file)
@@ -0,0 +1,86 @@
+import json
+from collections import namedtuple
+
+FACE_GROUPS = ['eyebrows', 'eyes', 'chin', 'forehead', 'head', 'mouth', 'nose', 'ears', 'cheek']
+
+ModifierInfo = namedtuple("ModifierInfo", ["name", "group", "min", "max", "default", "sigma", "opposite"])
+
+
+class ModifierMetadata:
+    """Snapshot of the modifiers of a human, taken once and reused for every generated sample.
+
+    The snapshot is kept per process by get() and must be dropped with invalidate() whenever the set of
+    modifiers of the selected human changes. It can be saved to json and loaded back without MakeHuman, which
+    is how headless runs learn the modifier ranges."""
+
+    NARROW_SIGMA = ["forehead/forehead-nubian-less|more", "forehead/forehead-scale-vert-less|more"]
+    SYMMETRY_BOUNDED = ["head/head-trans-in|out", "nose/nose-trans-in|out", "mouth/mouth-trans-in|out"]
+    FILE_NAME = "modifiers.json"
+
+    _current = None
+
+    def __init__(self, infos, human=None):
+        self.human = human
+        self.modifiers = dict()
+        self.groups = dict()
+
+        for info in infos:
+            self.modifiers[info.name] = info
+            self.groups.setdefault(info.group, []).append(info.name)
+
+    @classmethod
+    def from_human(cls, human):
+        infos = []
+        for name in human.getModifierNames():
+            m = human.getModifier(name)
+            infos.append(ModifierInfo(m.fullName, m.groupName, m.getMin(), m.getMax(), m.getDefaultValue(),
+                                      cls.__sigma(m.fullName), m.getSymmetricOpposite()))
+        return cls(infos, human)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as json_file:
+            data = json.load(json_file)
+        return cls([ModifierInfo(**info) for info in data["modifiers"]])
+
+    def save(self, path):
+        with open(path, "w") as json_file:
+            json.dump({"modifiers": [info._asdict() for info in self.modifiers.values()]}, json_file, indent=4)
+
+    @classmethod
+    def get(cls, human):
+        if cls._current is None or cls._current.human is not human:
+            cls._current = cls.from_human(human)
+        return cls._current
+
+    @classmethod
+    def invalidate(cls):
+        cls._current = None
+
+    def names(self, groups=None):
+        groups = FACE_GROUPS if groups is None else groups
+        return [name for group in groups for name in self.groups.get(group, [])]
+
+    def random_modifiers(self, choices, symmetry=0):
+        """(name, min, max, default, sigma) tuples as expected by GenerationJob in random mode."""
+        modifiers = []
+
+        for name in choices:
+            info = self.modifiers[name]
+            mMin = info.min
+            mMax = info.max
+
+            if info.name in self.SYMMETRY_BOUNDED:
+                w = float(abs(mMax - mMin) * (1 - symmetry))
+                mMin = max(mMin, info.default - w / 2)
+                mMax = min(mMax, info.default + w / 2)
+
+            modifiers.append((info.name, mMin, mMax, info.default, info.sigma))
+
+        return modifiers
+
+    @classmethod
+    def __sigma(cls, name):
+        if name in cls.NARROW_SIGMA:
+            return 0.02
+        return 0.1
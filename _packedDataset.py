@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+
+from ._mhmWriter import MhmWriter
+from ._splitAssigner import SPLITS
+
+
+class PackedDataset:
+    """A whole generation run stored as one float32 matrix (one row per human, one column per modifier) plus a
+    split column and a json header, instead of one .mhm file per human. Both arrays are .npy files opened as
+    memory maps, so pool workers fill disjoint row ranges of the same files concurrently."""
+
+    HEADER_FILE = "header.json"
+    PARAMETERS_FILE = "parameters.npy"
+    SPLITS_FILE = "splits.npy"
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+
+        with open(os.path.join(path, self.HEADER_FILE), "r") as json_file:
+            self.header = json.load(json_file)
+
+        self.choices = self.header["choices"]
+        self.parameters = np.load(os.path.join(path, self.PARAMETERS_FILE), mmap_mode=mode)
+        self.splits = np.load(os.path.join(path, self.SPLITS_FILE), mmap_mode=mode)
+
+    @classmethod
+    def create(cls, path, choices, n, macrodetails, seed, first_number=0):
+        header = {
+            "choices": list(choices),
+            "n": n,
+            "macrodetails": macrodetails,
+            "seed": seed,
+            "first_number": first_number,
+            "splits": SPLITS
+        }
+
+        with open(os.path.join(path, cls.HEADER_FILE), "x") as json_file:
+            json.dump(header, json_file, indent=4)
+
+        np.lib.format.open_memmap(os.path.join(path, cls.PARAMETERS_FILE), mode="w+", dtype=np.float32,
+                                  shape=(n, len(choices))).flush()
+        np.lib.format.open_memmap(os.path.join(path, cls.SPLITS_FILE), mode="w+", dtype=np.uint8,
+                                  shape=(n,)).flush()
+
+        return cls(path, mode="r+")
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def write_rows(self, start, values, splits):
+        stop = start + len(values)
+        self.parameters[start:stop] = np.asarray(values, dtype=np.float32)
+        self.splits[start:stop] = [SPLITS.index(split) for split in splits]
+
+    def flush(self):
+        self.parameters.flush()
+        self.splits.flush()
+
+    def split(self, row):
+        return SPLITS[self.splits[row]]
+
+    def number(self, row):
+        return row + self.header["first_number"]
+
+    def export_mhm(self, rows, path=None):
+        """Materialize the given rows as regular .mhm files, under path/<split>/ (by default next to the data)."""
+        path = self.path if path is None else path
+
+        with MhmWriter(self.header["macrodetails"], self.choices) as writer:
+            for row in rows:
+                split_path = os.path.join(path, self.split(row))
+                os.makedirs(split_path, exist_ok=True)
+                writer.queue(split_path, self.number(row), self.parameters[row].tolist())
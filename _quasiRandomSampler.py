@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+
+from ._combinationStream import IndexPermutation, mix64, mix64_array
+
+try:
+    from scipy.stats import qmc
+except ImportError:
+    qmc = None
+
+
+class QuasiRandomSampler:
+    """Low-discrepancy samples of the box spanned by the modifier ranges, as an alternative to both the full grid
+    and independent gaussians.
+
+    "lhs" is a Latin hypercube: on every axis the n samples fall in n different strata. The stratum of sample i
+    on axis k is a seeded IndexPermutation of i and the jitter inside the stratum is hashed from (i, k), so any
+    range of samples can be produced on its own. "sobol" uses the scrambled Sobol sequence of scipy (optional
+    dependency) fast-forwarded to the requested range, and works best when n is a power of two."""
+
+    METHODS = ["lhs", "sobol"]
+
+    def __init__(self, method, minimum, maximum, n, seed):
+        if method not in self.METHODS:
+            raise ValueError("Unknown quasi-random sampling method " + str(method))
+        if method == "sobol" and qmc is None:
+            raise ImportError("Sobol sampling needs scipy, use Latin hypercube sampling instead")
+
+        self.method = method
+        self.minimum = np.asarray(minimum, dtype=np.float64)
+        self.maximum = np.asarray(maximum, dtype=np.float64)
+        self.n = n
+        self.seed = seed
+
+        dimensions = len(self.minimum)
+        self.permutations = [IndexPermutation(n, mix64(seed ^ mix64(axis))) for axis in range(dimensions)]
+        self.jitter_keys = np.array([mix64(mix64(seed) ^ (axis + 1)) for axis in range(dimensions)], dtype=np.uint64)
+
+    @classmethod
+    def from_modifiers(cls, method, modifiers, n, seed):
+        columns = list(zip(*[modifier[1:3] for modifier in modifiers])) or [(), ()]
+        return cls(method, columns[0], columns[1], n, seed)
+
+    def __len__(self):
+        return len(self.minimum)
+
+    def unit_samples(self, start, stop):
+        """Samples start to stop (excluded) in the unit hypercube, shape (stop - start, dimensions)."""
+        if self.method == "sobol":
+            return self.__sobol(start, stop)
+
+        indices = np.arange(start, stop, dtype=np.int64)
+        strata = np.stack([permutation.take(indices) for permutation in self.permutations], axis=1)
+        hashes = mix64_array(indices.astype(np.uint64)[:, None] ^ self.jitter_keys[None, :])
+        jitter = (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+        return (strata + jitter) / self.n
+
+    def sample(self, start, stop):
+        return self.minimum + self.unit_samples(start, stop) * (self.maximum - self.minimum)
+
+    def __sobol(self, start, stop):
+        try:
+            engine = qmc.Sobol(len(self), scramble=True, rng=self.seed)
+        except TypeError:
+            # scipy < 1.15
+            engine = qmc.Sobol(len(self), scramble=True, seed=self.seed)
+
+        with warnings.catch_warnings():
+            # Sobol prefers power of two sample counts, chunks are rarely aligned on them
+            warnings.simplefilter("ignore", UserWarning)
+            if start > 0:
+                engine.fast_forward(start)
+            return engine.random(stop - start)
+
+
+def centered_discrepancy(samples, max_samples=2048):
+    """Centered L2 discrepancy of samples in the unit hypercube (lower means a more uniform coverage). Only the
+    first max_samples rows are used, the cost grows with their square."""
+    samples = np.asarray(samples, dtype=np.float64)[:max_samples]
+    n, dimensions = samples.shape
+    if n == 0:
+        return 0.0
+
+    distance = np.abs(samples - 0.5)
+    first = np.prod(1 + 0.5 * distance - 0.5 * distance ** 2, axis=1).sum()
+
+    second = 0.0
+    for row in range(n):
+        pair = 1 + 0.5 * distance[row] + 0.5 * distance - 0.5 * np.abs(samples[row] - samples)
+        second += np.prod(pair, axis=1).sum()
+
+    return float(np.sqrt(max(0.0, (13 / 12) ** dimensions - 2 / n * first + second / n ** 2)))
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+
+class RunManifest:
+    """Progress record of a generation run, stored as run.json in the run directory.
+
+    Besides the job spec (which includes the seed) it keeps a high-water mark, the number of leading chunks
+    that are complete, plus the few chunks that finished out of order beyond it. It is flushed at most every
+    FLUSH_INTERVAL seconds, so a crashed run is resumed by redoing only the chunks written after the last
+    flush, without looking at the output directories."""
+
+    FILE_NAME = "run.json"
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, path, spec, high_water_mark=0, completed=None, finished=False):
+        self.path = path
+        self.spec = spec
+        self.high_water_mark = high_water_mark
+        self.completed = set(completed or [])
+        self.finished = finished
+        self.last_flush = 0.0
+
+    @classmethod
+    def create(cls, path, spec):
+        manifest = cls(path, spec)
+        manifest.flush()
+        return manifest
+
+    @classmethod
+    def load(cls, path):
+        file_name = os.path.join(path, cls.FILE_NAME)
+        if not os.path.exists(file_name):
+            raise IOError(file_name + " does not exist, the run cannot be resumed")
+
+        with open(file_name, "r") as json_file:
+            data = json.load(json_file)
+
+        return cls(path, data["spec"], data["high_water_mark"], data["completed"], data["finished"])
+
+    def is_done(self, chunk):
+        return chunk < self.high_water_mark or chunk in self.completed
+
+    def mark_done(self, chunk):
+        self.completed.add(chunk)
+        while self.high_water_mark in self.completed:
+            self.completed.remove(self.high_water_mark)
+            self.high_water_mark += 1
+
+        if time.time() - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        data = {
+            "spec": self.spec,
+            "high_water_mark": self.high_water_mark,
+            "completed": sorted(self.completed),
+            "finished": self.finished
+        }
+
+        file_name = os.path.join(self.path, self.FILE_NAME)
+        with open(file_name + ".tmp", "w") as json_file:
+            json.dump(data, json_file, indent=4)
+        os.replace(file_name + ".tmp", file_name)
+
+        self.last_flush = time.time()
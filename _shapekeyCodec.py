@@ -0,0 +1,89 @@
+"""Shape key names of targets. The maximum length of a shape key name is 61 characters in blender, and the
+combinations used in MH filenames tend to be longer than that, so the common words are encoded as $xx codes."""
+import os
+import re
+from functools import lru_cache
+
+SHAPEKEY_ENCODING = [
+    ["macrodetail", "$md"],
+    ["female", "$fe"],
+    ["male", "$ma"],
+    ["caucasian", "$ca"],
+    ["asian", "$as"],
+    ["african", "$af"],
+    ["average", "$av"],
+    ["weight", "$wg"],
+    ["height", "$hg"],
+    ["muscle", "$mu"],
+    ["proportions", "$pr"],
+    ["firmness", "$fi"],
+    ["ideal", "$id"],
+    ["uncommon", "$un"],
+    ["young", "$yn"],
+    ["child", "$ch"],
+]
+
+MACRO_PATH_PATTERN = "/mpfb/data/targets/macrodetails/"
+
+_TARGET_SUFFIX = re.compile(r'(?:\.p?target)?(?:\.gz)?$', flags=re.IGNORECASE)
+
+_CACHE_SIZE = 8192
+
+
+# Names are encoded with one str.replace per word of the table, in order. A single regex pass over an alternation
+# gives the same names but calls back into Python for every match, which is slower on uncached names
+@lru_cache(maxsize=_CACHE_SIZE)
+def encode_shapekey_name(original_name):
+    name = str(original_name)
+    for word, code in SHAPEKEY_ENCODING:
+        name = name.replace(word, code)
+    return name
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def decode_shapekey_name(encoded_name):
+    name = str(encoded_name)
+    # Every code starts with $, most shape key names have none
+    if "$" not in name:
+        return name
+    for word, code in SHAPEKEY_ENCODING:
+        name = name.replace(code, word)
+    return name
+
+
+def filename_to_shapekey_name(filename, *, macrodetail=False, encode_name=None):
+    """Shape key name of a target file. With macrodetail=None the file is a macro detail when its absolute path
+    lies below the macrodetails directory of mpfb."""
+    filename = str(filename)
+
+    if macrodetail is None:
+        # Relative paths depend on the working directory and are never cached
+        if os.path.isabs(filename):
+            macrodetail = _is_macrodetail_path(filename)
+        else:
+            macrodetail = _is_macrodetail_path.__wrapped__(filename)
+
+    return _filename_to_shapekey_name(filename, bool(macrodetail), encode_name)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _is_macrodetail_path(filename):
+    return MACRO_PATH_PATTERN in os.path.abspath(filename).replace(os.sep, "/").lower()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _filename_to_shapekey_name(filename, macrodetail, encode_name):
+    name = _TARGET_SUFFIX.sub("", os.path.basename(filename), count=1)
+
+    if macrodetail:
+        name = "macrodetail-" + name
+        if encode_name is None:
+            encode_name = True
+
+    if encode_name is None and len(name) > 60:
+        encode_name = True
+
+    if encode_name:
+        name = encode_shapekey_name(name)
+
+    return name
@@ -0,0 +1,62 @@
+import numpy as np
+
+from ._combinationStream import mix64, mix64_array
+
+SPLITS = ["train", "test", "validation"]
+
+
+class SplitAssigner:
+    """Assigns every sample to train, test or validation from a stable 64 bit hash, so the split of a sample
+    never depends on the order it was produced in and workers agree on it without talking to each other.
+
+    With key="parameters" the hash is taken over the parameter values (rounded to the precision of the .mhm
+    files), so the same human lands in the same split whenever it is generated again. With key="index" the
+    sample index is hashed instead, which is cheaper and stable for a given run."""
+
+    DEFAULT_RATIOS = {"train": 0.7, "test": 0.15, "validation": 0.15}
+    KEYS = ["parameters", "index"]
+    PRECISION = 6
+
+    def __init__(self, ratios=None, seed=0, key="parameters"):
+        ratios = dict(self.DEFAULT_RATIOS if ratios is None else ratios)
+        if set(ratios) - set(SPLITS):
+            raise ValueError("Unknown splits " + str(sorted(set(ratios) - set(SPLITS))))
+        if key not in self.KEYS:
+            raise ValueError("Unknown split key " + str(key))
+
+        total = float(sum(ratios.values()))
+        if total <= 0:
+            raise ValueError("Split ratios must not all be zero")
+
+        self.ratios = ratios
+        self.seed = seed
+        self.key = key
+        self.hash_seed = np.uint64(mix64(seed))
+
+        # Upper bound of every split in the hash space, the last one always reaches the top
+        self.bounds = []
+        cumulative = 0.0
+        for split in SPLITS:
+            cumulative += ratios.get(split, 0.0) / total
+            self.bounds.append(min(cumulative, 1.0))
+        self.bounds[-1] = 1.0
+        self.thresholds = np.array([bound * 2.0 ** 53 for bound in self.bounds], dtype=np.float64)
+
+    def directories(self):
+        return [split for split in SPLITS if self.ratios.get(split, 0.0) > 0]
+
+    def assign(self, start, values):
+        """Split names of the samples start, start + 1, ... whose parameter rows are given in values."""
+        count = len(values)
+
+        if self.key == "index":
+            hashes = mix64_array(np.arange(start, start + count, dtype=np.uint64) ^ self.hash_seed)
+        else:
+            quantized = np.rint(np.asarray(values, dtype=np.float64).reshape(count, -1) * 10 ** self.PRECISION)
+            hashes = np.full(count, self.hash_seed, dtype=np.uint64)
+            for column in quantized.astype(np.int64).view(np.uint64).T:
+                hashes = mix64_array(hashes ^ column)
+
+        positions = (hashes >> np.uint64(11)).astype(np.float64)
+        indices = np.searchsorted(self.thresholds, positions, side="right")
+        return [SPLITS[index] for index in np.minimum(indices, len(SPLITS) - 1)]
@@ -0,0 +1,133 @@
+import numpy as np
+
+from ._modifierMetadata import FACE_GROUPS
+from ._targetCache import parse_target_string, read_target_string
+from ._targetIndex import TargetIndex
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+def read_obj_vertices(path):
+    """Vertex positions of a Wavefront file as a float32 (n, 3) array, in Blender axis order like the targets."""
+    vertices = []
+
+    with open(path, "r") as obj_file:
+        for line in obj_file:
+            if line.startswith("v "):
+                parts = line.split()
+                vertices.append((float(parts[1]), -float(parts[3]), float(parts[2])))  # XZY order, -Y
+
+    return np.array(vertices, dtype=np.float32).reshape(-1, 3)
+
+
+def modifier_targets(modifier_name):
+    """(negative target, positive target) of a modifier. "nose/nose-trans-up|down" drives nose-trans-up with
+    negative values and nose-trans-down with positive ones; a modifier without "|" has no negative target."""
+    name = modifier_name.split("/", 1)[-1]
+
+    if "|" not in name:
+        return None, name
+
+    head, positive = name.split("|", 1)
+    prefix, negative = head.rsplit("-", 1)
+    return prefix + "-" + negative, prefix + "-" + positive
+
+
+class TargetBank:
+    """All the targets driven by a set of modifiers, held as one (vertices * 3, targets) delta matrix, so that the
+    final vertex positions of a whole batch of humans are computed with a single matrix product and without bpy.
+
+    Column j of the matrix holds the deltas of one target, driven by the modifier in column sources[j] of the
+    parameter rows: the positive target of a modifier weighs max(value, 0), the negative one max(-value, 0). The
+    matrix is a scipy sparse matrix when scipy is installed and a dense array otherwise. Macro targets, the feet
+    on ground offset and anything else applied by Blender afterwards is not part of the bank."""
+
+    def __init__(self, base_vertices, modifiers, sources, signs, matrix):
+        self.base_vertices = np.asarray(base_vertices, dtype=np.float32)
+        self.modifiers = list(modifiers)
+        self.sources = np.asarray(sources, dtype=np.intp)
+        self.signs = np.asarray(signs, dtype=np.float32)
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, modifier_names, targets_dir, base_obj, target_index=None, target_cache=None):
+        """Bank of the given modifiers. Targets are found through target_index (a TargetIndex of targets_dir is
+        built when none is given) and read through target_cache when one is given."""
+        if target_index is None:
+            target_index = TargetIndex.load_or_build(targets_dir)
+
+        base_vertices = read_obj_vertices(base_obj)
+        sources = []
+        signs = []
+        rows = []
+        columns = []
+        deltas = []
+
+        for source, modifier_name in enumerate(modifier_names):
+            negative, positive = modifier_targets(modifier_name)
+
+            for sign, target_name in [(-1.0, negative), (1.0, positive)]:
+                if target_name is None:
+                    continue
+
+                full_path = target_index.resolve(target_name + ".target")
+                if not full_path:
+                    print("Skipping target because it could not be resolved to a path", target_name)
+                    continue
+
+                if target_cache is not None:
+                    indices, target_deltas = target_cache.load(full_path)
+                else:
+                    records = parse_target_string(read_target_string(full_path))
+                    indices, target_deltas = records["index"], records["delta"]
+
+                column = len(sources)
+                sources.append(source)
+                signs.append(sign)
+                rows.append((np.asarray(indices, dtype=np.int64)[:, None] * 3 + np.arange(3)).ravel())
+                columns.append(np.full(len(indices) * 3, column, dtype=np.int64))
+                deltas.append(np.asarray(target_deltas, dtype=np.float32).ravel())
+
+        shape = (len(base_vertices) * 3, len(sources))
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        deltas = np.concatenate(deltas) if deltas else np.zeros(0, dtype=np.float32)
+
+        if sparse is not None:
+            matrix = sparse.csr_matrix((deltas, (rows, columns)), shape=shape, dtype=np.float32)
+        else:
+            matrix = np.zeros(shape, dtype=np.float32)
+            np.add.at(matrix, (rows, columns), deltas)
+
+        return cls(base_vertices, modifier_names, sources, signs, matrix)
+
+    @classmethod
+    def from_metadata(cls, metadata, targets_dir, base_obj, groups=None, **kwargs):
+        """Bank of the modifiers of the given groups (the face groups by default) of a ModifierMetadata."""
+        return cls.build(metadata.names(FACE_GROUPS if groups is None else groups), targets_dir, base_obj, **kwargs)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def weights(self, values):
+        """(batch, targets) target weights of (batch, modifiers) parameter rows, in the order of self.modifiers."""
+        values = np.asarray(values, dtype=np.float32).reshape(-1, len(self.modifiers))
+        return np.maximum(values[:, self.sources] * self.signs, 0.0)
+
+    def synthesize(self, values, scale_factor=1.0):
+        """Final vertex positions, shape (batch, vertices, 3), of the humans with the given parameter rows."""
+        weights = self.weights(values)
+
+        if sparse is not None and sparse.issparse(self.matrix):
+            offsets = np.asarray(self.matrix @ weights.T).T
+        else:
+            offsets = weights @ self.matrix.T
+
+        positions = offsets.reshape(len(weights), -1, 3) + self.base_vertices
+        if scale_factor != 1.0:
+            positions *= np.float32(scale_factor)
+
+        return positions.astype(np.float32, copy=False)
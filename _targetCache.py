@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+TARGET_DTYPE = np.dtype([("index", "<i4"), ("delta", "<f4", (3,))])
+
+
+def read_target_string(full_path):
+    if str(full_path).endswith(".gz"):
+        with gzip.open(full_path, "rb") as gzip_file:
+            return gzip_file.read().decode('utf-8')
+
+    with open(full_path, "r") as target_file:
+        return target_file.read()
+
+
+def parse_target_string(target_string):
+    """Parse the text of a target into an array of TARGET_DTYPE, with the deltas already in Blender axis order."""
+    rows = []
+
+    for line in target_string.splitlines():
+        target_line = str(line.strip())
+        if target_line and not target_line.startswith("#") and not target_line.startswith("\""):
+            parts = target_line.split(" ", 4)
+            rows.append((int(parts[0]), (float(parts[1]), -float(parts[3]), float(parts[2]))))  # XZY order, -Y
+
+    return np.array(rows, dtype=TARGET_DTYPE)
+
+
+def sum_targets(weighted_targets):
+    """Weighted sum of targets given as (indices, deltas, weight) triples, as TARGET_DTYPE records holding every
+    vertex touched by any of them once."""
+    indices = []
+    deltas = []
+
+    for target_indices, target_deltas, weight in weighted_targets:
+        indices.append(np.asarray(target_indices))
+        deltas.append(np.asarray(target_deltas, dtype=np.float64) * weight)
+
+    if not indices:
+        return np.zeros(0, dtype=TARGET_DTYPE)
+
+    vertices, positions = np.unique(np.concatenate(indices), return_inverse=True)
+    summed = np.zeros((len(vertices), 3), dtype=np.float64)
+    np.add.at(summed, positions.ravel(), np.concatenate(deltas))
+
+    records = np.empty(len(vertices), dtype=TARGET_DTYPE)
+    records["index"] = vertices
+    records["delta"] = summed
+    return records
+
+
+def write_records(cache_file, records):
+    """Atomically write records to an .npy file, so concurrent readers never see a partial file."""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temporary_file = cache_file + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+        with open(temporary_file, "wb") as npy_file:
+            np.save(npy_file, records)
+        os.replace(temporary_file, cache_file)
+    except IOError as e:
+        print("Could not write the compiled target", cache_file, e)
+
+
+class TargetCache:
+    """Compiled copies of target files, so every target is gunzipped and parsed only once per machine.
+
+    Every target is stored as an .npy file holding one TARGET_DTYPE record (int32 vertex index, float32 XYZ
+    delta) per line of the target, and is read back as a read-only memory map. The cache file name is a hash of
+    the absolute source path, its size and its mtime, so an edited target is simply compiled again."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def cache_file(self, full_path):
+        stat = os.stat(full_path)
+        key = os.path.abspath(full_path) + "|" + str(stat.st_size) + "|" + str(stat.st_mtime_ns)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npy")
+
+    def load(self, full_path):
+        """(indices, deltas) of a target: an int32 array of vertex indices and a float32 (n, 3) delta array."""
+        records = self.load_records(full_path)
+        return records["index"], records["delta"]
+
+    def load_records(self, full_path):
+        cache_file = self.cache_file(full_path)
+
+        if os.path.exists(cache_file):
+            try:
+                return np.load(cache_file, mmap_mode="r")
+            except ValueError:
+                # Targets without any line cannot be memory mapped
+                return np.load(cache_file)
+
+        records = parse_target_string(read_target_string(full_path))
+        write_records(cache_file, records)
+        return records
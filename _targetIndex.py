@@ -0,0 +1,96 @@
+import bisect
+import json
+import os
+from pathlib import Path
+
+
+class TargetIndex:
+    """Name to path index of the .target.gz files below a targets directory.
+
+    The files are listed once, in the order Path.rglob yields them, and resolve() returns the first of them whose
+    lowercase basename starts with the lowercase target name, exactly like a linear rglob scan would, but with a
+    binary search over the sorted basenames and a memo of the names already resolved. The listing is persisted to
+    a json cache file together with the mtime of every directory below the targets directory, and reused as long
+    as none of those directories changed."""
+
+    VERSION = 1
+
+    def __init__(self, targets_dir, paths, directories):
+        self.targets_dir = str(targets_dir)
+        self.paths = list(paths)
+        self.directories = dict(directories)
+        self.resolved = dict()
+
+        # (basename, position in rglob order), sorted so that all names sharing a prefix are contiguous
+        self.basenames = sorted((os.path.basename(path).lower(), order) for order, path in enumerate(self.paths))
+        self.keys = [basename for basename, order in self.basenames]
+
+    @classmethod
+    def build(cls, targets_dir):
+        paths = [str(name) for name in Path(targets_dir).rglob("*.target.gz")]
+        return cls(targets_dir, paths, cls.__directory_mtimes(targets_dir))
+
+    @classmethod
+    def load_or_build(cls, targets_dir, cache_file=None):
+        if cache_file is not None and os.path.exists(cache_file):
+            try:
+                with open(cache_file, "r") as json_file:
+                    data = json.load(json_file)
+                if data["version"] == cls.VERSION and data["targets_dir"] == str(targets_dir):
+                    index = cls(targets_dir, data["paths"], data["directories"])
+                    if index.is_valid():
+                        return index
+            except (IOError, ValueError, KeyError):
+                pass
+
+        index = cls.build(targets_dir)
+        if cache_file is not None:
+            index.save(cache_file)
+        return index
+
+    def save(self, cache_file):
+        data = {
+            "version": self.VERSION,
+            "targets_dir": self.targets_dir,
+            "directories": self.directories,
+            "paths": self.paths
+        }
+
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file + ".tmp", "w") as json_file:
+                json.dump(data, json_file)
+            os.replace(cache_file + ".tmp", cache_file)
+        except IOError as e:
+            print("Could not write the target index cache", cache_file, e)
+
+    def is_valid(self):
+        for directory, mtime in self.directories.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def resolve(self, target_name):
+        prefix = str(target_name).lower()
+
+        if prefix not in self.resolved:
+            start = bisect.bisect_left(self.keys, prefix)
+            best = None
+            for basename, order in self.basenames[start:]:
+                if not basename.startswith(prefix):
+                    break
+                if best is None or order < best:
+                    best = order
+            self.resolved[prefix] = None if best is None else self.paths[best]
+
+        return self.resolved[prefix]
+
+    @staticmethod
+    def __directory_mtimes(targets_dir):
+        mtimes = dict()
+        for directory, subdirectories, files in os.walk(targets_dir):
+            mtimes[directory] = os.stat(directory).st_mtime_ns
+        return mtimes
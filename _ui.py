@@ -13,6 +13,7 @@ from numba import cuda
 from getpath import formatPath
 from PyQt5 import QtWidgets, QtCore, QtGui
 from ._checkboxTreeView import CheckboxTreeView
+from ._generationEngine import FORK_WORKERS
 from ._humanGenerator import HumanGenerator
 from ._imageGenerator import ImageGenerator
 
@@ -100,19 +101,50 @@ class CreateUI:
         self.n_files.hide()
         toggle_vertical_layout.addLayout(toggle_horizontal_layout)
 
+        sampling_layout = QtWidgets.QHBoxLayout()
+        self.sampling_label = gui.TextView('Sampling: ')
+        self.sampling_label.hide()
+        sampling_layout.addWidget(self.sampling_label)
+
+        self.sampling_combobox = QtWidgets.QComboBox()
+        self.sampling_combobox.addItem("Gaussian", "gaussian")
+        self.sampling_combobox.addItem("Latin hypercube", "lhs")
+        self.sampling_combobox.addItem("Sobol", "sobol")
+        self.sampling_combobox.setCurrentIndex(0)
+        sampling_layout.addWidget(self.sampling_combobox)
+        self.sampling_combobox.hide()
+        toggle_vertical_layout.addLayout(sampling_layout)
+
         @self.random_toggle.mhEvent
         def onClicked(event):
             if self.random_toggle.selected:
                 self.is_random_selected = True
                 self.random_label.show()
                 self.n_files.show()
+                self.sampling_label.show()
+                self.sampling_combobox.show()
             else:
                 self.is_random_selected = False
                 self.random_label.hide()
                 self.n_files.hide()
+                self.sampling_label.hide()
+                self.sampling_combobox.hide()
 
         self.vertical_layout.addLayout(toggle_vertical_layout)
 
+        # create worker count chooser for parallel generation
+        workers_layout = QtWidgets.QHBoxLayout()
+        workers_layout.addWidget(QtWidgets.QLabel("Worker processes:"))
+        self.workers = QtWidgets.QSpinBox()
+        self.workers.setMinimum(1)
+        self.workers.setMaximum((os.cpu_count() or 1) if FORK_WORKERS else 1)
+        self.workers.setValue(1)
+        workers_layout.addWidget(self.workers)
+        self.vertical_layout.addLayout(workers_layout)
+
+        self.packed_toggle = gui.CheckBox('Packed dataset (single .npy matrix instead of .mhm files)')
+        self.vertical_layout.addWidget(self.packed_toggle)
+
         # create path chooser for saving files
         horizontal_layout = QtWidgets.QHBoxLayout()
         file_entry_label = QtWidgets.QLabel("Select Folder:")
@@ -157,7 +189,9 @@ class CreateUI:
 
             log.message('human_path = ' + G.app.getSetting('human_path') + f'\t {self.file_entry.directory}')
             human_generator = HumanGenerator(self.task_view, self.__get_macrodetails_string(), self.file_entry.directory)
-            human_generator.create_humans(self.checkbox_tree_view.choices, self.value, self.n_files.value(), self.is_random_selected)
+            human_generator.create_humans(self.checkbox_tree_view.choices, self.value, self.n_files.value(),
+                                          self.is_random_selected, self.workers.value(),
+                                          self.packed_toggle.selected, self.sampling_combobox.currentData())
             self.task_view.gui3d.app.statusPersist("")
 
     def __create_image_generation_box(self):
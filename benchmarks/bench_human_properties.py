@@ -0,0 +1,61 @@
+"""Per-human cost of the human property set, rebuilt for every human (as create_human used to) against the
+process-wide one of MhmImporter.
+
+Usage: blender -b --python benchmarks/bench_human_properties.py -- [n_humans] [repeat]
+
+Needs Blender with the MPFB2 add-on; the human properties are read from the folder given by _config (set
+FACEPAR_MPFB_DIR if mpfb is not importable). Every round sets the macro details of a fresh object, as
+create_human does, so both timings include the same property writes."""
+import os
+import sys
+import time
+import types
+
+import bpy
+
+# Register the plugin folder as a package without running its __init__, which needs the MakeHuman GUI
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+from faceparametrization import _config  # noqa: E402
+from faceparametrization._blenderconfigset import BlenderConfigSet  # noqa: E402
+from faceparametrization._mhmImporter import MhmImporter  # noqa: E402
+from faceparametrization._mhmParser import get_default_macro_info_dict  # noqa: E402
+
+
+def legacy_properties():
+    # create_human before the property set was shared
+    properties = BlenderConfigSet.get_definitions_in_json_directory(_config.object_properties_dir("humanproperties"))
+    return BlenderConfigSet(properties, bpy.types.Object, prefix="HUM_")
+
+
+def timed(get_properties, blender_object, macro_detail_dict, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        MhmImporter._set_macro_details(blender_object, get_properties(), macro_detail_dict)
+    return time.perf_counter() - start
+
+
+def main():
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    n = int(arguments[0]) if len(arguments) > 0 else 200
+    repeat = int(arguments[1]) if len(arguments) > 1 else 3
+
+    blender_object = bpy.data.objects.new("bench_human_properties", bpy.data.meshes.new("bench_human_properties"))
+    macro_detail_dict = get_default_macro_info_dict()
+
+    # Interleaved runs, the best one is kept
+    before = after = float("inf")
+    for _ in range(repeat):
+        before = min(before, timed(legacy_properties, blender_object, macro_detail_dict, n))
+        after = min(after, timed(MhmImporter._get_human_object_properties, blender_object, macro_detail_dict, n))
+
+    print(f"{n} humans, best of {repeat}: rebuilt {1000 * before / n:.3f} ms/human, "
+          f"shared {1000 * after / n:.3f} ms/human, saved {1000 * (before - after) / n:.3f} ms/human")
+
+
+if __name__ == '__main__':
+    main()
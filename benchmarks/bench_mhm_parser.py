@@ -0,0 +1,170 @@
+"""Parity and files/second of the .mhm parser, the legacy MhmImporter functions against _mhmParser.
+
+Usage: python benchmarks/bench_mhm_parser.py [mhm_dir] [n_files] [repeat]
+
+Without a directory, n_files humans with random face modifiers and macrodetails are generated with MhmWriter in a
+temporary directory. Every file is first parsed with both implementations; the script exits with an error on the
+first human_info that differs. Only needs the standard library, the modules are imported straight from the plugin
+folder (the former parsing functions of MhmImporter are kept below)."""
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _mhmParser  # noqa: E402
+from _mhmWriter import MhmWriter  # noqa: E402
+
+MODIFIERS = ["nose/nose-trans-up|down", "nose/nose-trans-in|out", "nose/nose-scale-vert-incr|decr",
+             "mouth/mouth-lowerlip-height-decr|incr", "chin/chin-prominent-decr|incr", "head/head-oval",
+             "eyes/r-eye-bag-in|out", "eyebrows/eyebrows-angle-down|up", "forehead/forehead-nubian-decr|incr",
+             "cheek/l-cheek-bones-decr|incr", "head/head-back-scale-decr|incr", "ears/r-ear-shape-pointed|triangle"]
+
+MACRODETAILS = ["modifier macrodetails/Gender {:.6f}", "modifier macrodetails/Caucasian {:.6f}",
+                "modifier macrodetails/African {:.6f}", "modifier macrodetails/Asian {:.6f}",
+                "modifier macrodetails/Age {:.6f}", "modifier macrodetails-universal/Weight {:.6f}",
+                "modifier macrodetails-universal/Muscle {:.6f}", "modifier macrodetails-height/Height {:.6f}",
+                "modifier macrodetails-proportions/BodyProportions {:.6f}", "modifier breast/BreastSize {:.6f}",
+                "modifier breast/BreastFirmness {:.6f}"]
+
+
+def legacy_translate(mhm_line):
+    # MhmImporter.translate_mhm_target_line_to_target_fragment before _mhmParser
+    name, weight = mhm_line.split(" ", 1)
+
+    weight = float(weight)
+    for opposite in _mhmParser.OPPOSITES:
+        negative, positive = opposite.split("-", 1)
+        mhm_term = negative + "|" + positive
+
+        if mhm_term in mhm_line:
+
+            if weight < 0.0:
+                name = name.replace(mhm_term, negative)
+                weight = -weight
+            else:
+                name = name.replace(mhm_term, positive)
+    if "/" in name:
+        dirname, name = name.split("/", 1)
+
+    return {"target": name, "value": weight}
+
+
+def legacy_parse_modifier_line(human_info, line):
+    # MhmImporter._parse_mhm_modifier_line before _mhmParser
+    line = str(line).replace("modifier ", "")
+
+    for simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height", "BodyProportions", "Asian", "African",
+                         "Caucasian", "BreastSize", "BreastFirmness"]:
+        macroline = line
+        macroline = macroline.replace("breast/", "")
+        macroline = macroline.replace("macrodetails/", "")
+        macroline = macroline.replace("macrodetails-height/", "")
+        macroline = macroline.replace("macrodetails-universal/", "")
+        macroline = macroline.replace("macrodetails-proportions/", "")
+
+        if macroline.startswith(simple_macro + " "):
+            target, weight = macroline.split(" ", 1)
+            weight = float(weight)
+
+            if simple_macro in ["Asian", "African", "Caucasian"]:
+                human_info["phenotype"]["race"][simple_macro.lower()] = weight
+                return
+            if simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height"]:
+                human_info["phenotype"][simple_macro.lower()] = weight
+                return
+            if simple_macro == "BodyProportions":
+                human_info["phenotype"]["proportions"] = weight
+                return
+
+    target = legacy_translate(line)
+    if not "targets" in human_info or not human_info["targets"]:
+        human_info["targets"] = []
+    human_info["targets"].append(target)
+
+
+def legacy_parse(filename):
+    # The parsing part of MhmImporter.deserialize_from_mhm
+    mhm_string = Path(filename).read_text()
+
+    human_info = _mhmParser.create_default_human_info_dict()
+    name = None
+
+    for line in mhm_string.splitlines():
+        if line.startswith("modifier"):
+            legacy_parse_modifier_line(human_info, line)
+        else:
+            if line.startswith("skinMaterial"):
+                skinLine = line.replace("skinMaterial skins/", "")
+                skinLine = skinLine.replace("skinMaterial", "")
+                human_info["skin_mhmat"] = skinLine
+                human_info["skin_material_type"] = "ENHANCED_SSS"
+            if line.startswith("name "):
+                name = line.replace("name ", "")
+
+    if "rig" not in human_info or not human_info["rig"]:
+        human_info["rig"] = "default"
+
+    if not name:
+        match = re.search(r'.*([^/\\]*)\.(mhm|MHM)$', filename)
+        name = match.group(1)
+
+    human_info["name"] = name
+    return human_info
+
+
+def generate(directory, n):
+    rng = random.Random(0)
+
+    for number in range(n):
+        macrodetails = "\n".join(line.format(rng.uniform(0.0, 1.0)) for line in MACRODETAILS)
+        choices = rng.sample(MODIFIERS, rng.randint(1, len(MODIFIERS)))
+        writer = MhmWriter(macrodetails, choices)
+        values = [rng.choice([0.0, rng.uniform(-1.0, 1.0)]) for _ in choices]
+        writer.write(directory, number, list(zip(choices, values)))
+
+
+def best_time(parse, files, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for filename in files:
+            parse(filename)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    directory = (sys.argv[1] or None) if len(sys.argv) > 1 else None
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    temporary = None
+    if directory is None:
+        directory = temporary = tempfile.mkdtemp(prefix="bench_mhm_parser_")
+        generate(directory, n)
+
+    try:
+        files = sorted(str(path) for path in Path(directory).rglob("*.mhm"))
+
+        for filename in files:
+            if legacy_parse(filename) != _mhmParser.parse_mhm_file(filename):
+                sys.exit(f"human_info differs for {filename}")
+        print(f"{len(files)} files, identical human_info with both parsers")
+
+        before = best_time(legacy_parse, files, repeat)
+        after = best_time(_mhmParser.parse_mhm_file, files, repeat)
+        print(f"legacy {len(files) / before:.0f} files/s, _mhmParser {len(files) / after:.0f} files/s, "
+              f"speedup {before / after:.2f}x")
+    finally:
+        if temporary:
+            shutil.rmtree(temporary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Files/second of the .mhm writer, legacy per-file formatting against MhmWriter.
+
+Usage: python benchmarks/bench_mhm_writer.py [n_humans] [n_modifiers] [repeat]
+
+Only needs the standard library, the writer module is imported straight from the plugin folder."""
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _mhmWriter import MhmWriter  # noqa: E402
+
+MACRODETAILS = ("modifier macrodetails/Gender 1.0\nmodifier macrodetails/Caucasian 1.000000\n"
+                "modifier macrodetails/African 0.000000\nmodifier macrodetails/Asian 0.000000\n"
+                "modifier macrodetails/Age 0.26\nmodifier macrodetails-universal/Weight 0.8")
+
+
+def legacy_render(parameters, number):
+    # HumanGenerator.__write_human before the writer was precompiled
+    name = "name human_" + str(number)
+
+    pattern = r"\n\s+"
+    result = (MhmWriter.VERSION + "\n" + name + "\n" + MhmWriter.CAMERA + "\n" + MACRODETAILS + "\n" +
+              re.sub(pattern, "\n", MhmWriter.STANDARD_PARAMETERS) + "\n")
+
+    for param in parameters:
+        result += "modifier " + param[0] + " " + str(param[1]) + "\n"
+
+    result += re.sub(pattern, "\n", MhmWriter.SUFFIX)
+    return result
+
+
+def legacy_write_human(path, parameters, number):
+    file = open(path + "/human_" + str(number) + ".mhm", "x")
+    file.write(legacy_render(parameters, number))
+    file.close()
+
+
+def timed(write, to_disk):
+    directory = tempfile.mkdtemp(prefix="bench_mhm_") if to_disk else None
+    try:
+        start = time.perf_counter()
+        write(directory)
+        return time.perf_counter() - start
+    finally:
+        if directory:
+            shutil.rmtree(directory)
+
+
+def compare(label, n, legacy, compiled, to_disk, repeat):
+    # Runs are interleaved and the best one is kept, file system timings are noisy
+    before = after = float("inf")
+    for _ in range(repeat):
+        before = min(before, timed(legacy, to_disk))
+        after = min(after, timed(compiled, to_disk))
+
+    print(f"{label}: legacy {n / before:.0f} files/s, MhmWriter {n / after:.0f} files/s, "
+          f"speedup {before / after:.2f}x")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_modifiers = int(sys.argv[2]) if len(sys.argv) > 2 else 138
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    choices = [f"group/modifier-{i}-decr|incr" for i in range(n_modifiers)]
+    rng = random.Random(0)
+    rows = [[rng.uniform(-1.0, 1.0) for _ in choices] for _ in range(1000)]
+
+    def legacy_render_only(directory):
+        for number in range(n):
+            legacy_render(list(zip(choices, rows[number % len(rows)])), number)
+
+    def compiled_render_only(directory):
+        writer = MhmWriter(MACRODETAILS, choices)
+        for number in range(n):
+            writer.render_values(number, rows[number % len(rows)])
+
+    def legacy(directory):
+        for number in range(n):
+            legacy_write_human(directory, list(zip(choices, rows[number % len(rows)])), number)
+
+    def compiled(directory):
+        with MhmWriter(MACRODETAILS, choices) as writer:
+            for number in range(n):
+                writer.queue(directory, number, rows[number % len(rows)])
+
+    print(f"{n} humans x {n_modifiers} modifiers, best of {repeat}")
+    compare("render only   ", n, legacy_render_only, compiled_render_only, False, repeat)
+    compare("render + write", n, legacy, compiled, True, repeat)
+
+
+if __name__ == '__main__':
+    main()
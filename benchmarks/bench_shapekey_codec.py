@@ -0,0 +1,123 @@
+"""Names/second of the shape key name codec, the legacy TargetService functions against _shapekeyCodec.
+
+Usage: python benchmarks/bench_shapekey_codec.py [targets_dir] [repeat]
+
+Without a targets directory the names are built from the words of the encoding table. Both implementations give
+the same names, which tests/test_shapekey_codec.py checks. Only needs the standard library, the codec module is
+imported straight from the plugin folder."""
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _shapekeyCodec as codec  # noqa: E402
+from _shapekeyCodec import MACRO_PATH_PATTERN, SHAPEKEY_ENCODING  # noqa: E402
+
+
+def legacy_encode(original_name):
+    # TargetService.encode_shapekey_name before the codec
+    name = str(original_name)
+    for code in SHAPEKEY_ENCODING:
+        name = name.replace(code[0], code[1])
+    return name
+
+
+def legacy_decode(encoded_name):
+    name = str(encoded_name)
+    for code in SHAPEKEY_ENCODING:
+        name = name.replace(code[1], code[0])
+    return name
+
+
+def legacy_filename_to_shapekey_name(filename, *, macrodetail=False, encode_name=None):
+    name = os.path.basename(filename)
+
+    name = re.sub(r'\.gz$', "", name, flags=re.IGNORECASE)
+    name = re.sub(r'\.p?target$', "", name, flags=re.IGNORECASE)
+
+    if macrodetail is None:
+        path_items = Path(os.path.abspath(filename)).parts
+        macrodetail = MACRO_PATH_PATTERN in '/'.join(path_items).lower()
+
+    if macrodetail:
+        name = "macrodetail-" + name
+        if encode_name is None:
+            encode_name = True
+
+    if encode_name is None and len(name) > 60:
+        encode_name = True
+
+    if encode_name:
+        name = legacy_encode(name)
+
+    return name
+
+
+def synthetic_paths(n):
+    rng = random.Random(0)
+    words = [word for word, code in SHAPEKEY_ENCODING] + ["universal", "old", "min", "max", "decr", "incr", "nose"]
+    suffixes = [".target.gz", ".target", ".ptarget", ".gz", ".TARGET.GZ", "", ".gz.target", ".target.gz.gz"]
+    directories = ["/data/targets/nose", "/x/mpfb/data/targets/macrodetails", "/x/mpfb/data/targets/macrodetails/height"]
+
+    paths = []
+    for _ in range(n):
+        separator = rng.choice(["-", "_", ""])
+        name = separator.join(rng.choice(words) for _ in range(rng.randint(1, 7)))
+        paths.append(os.path.join(rng.choice(directories), name + rng.choice(suffixes)))
+    return paths
+
+
+def clear_caches():
+    codec.encode_shapekey_name.cache_clear()
+    codec.decode_shapekey_name.cache_clear()
+    codec._filename_to_shapekey_name.cache_clear()
+    codec._is_macrodetail_path.cache_clear()
+
+
+def best_time(function, paths, repeat, cold=False):
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        for path in paths:
+            function(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    targets_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    if targets_dir:
+        paths = [str(path) for path in Path(targets_dir).rglob("*.target.gz")]
+    else:
+        paths = synthetic_paths(2000)
+
+    print(f"{len(paths)} names")
+
+    def legacy(path):
+        name = legacy_filename_to_shapekey_name(path, macrodetail=None)
+        legacy_decode(legacy_encode(name))
+
+    def compiled(path):
+        name = codec.filename_to_shapekey_name(path, macrodetail=None)
+        codec.decode_shapekey_name(codec.encode_shapekey_name(name))
+
+    # A run loads the same targets for every human, so the warm (cached) case is the one that matters. Cold runs
+    # start from empty caches and pay for filling them
+    cold = best_time(compiled, paths, repeat, cold=True)
+    before = best_time(legacy, paths, repeat)
+    after = best_time(compiled, paths, repeat)
+
+    print(f"legacy {len(paths) / before:.0f} names/s, codec {len(paths) / cold:.0f} names/s cold, "
+          f"{len(paths) / after:.0f} names/s cached, speedup {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
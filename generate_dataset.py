@@ -0,0 +1,141 @@
+"""Headless dataset generation, without a MakeHuman session.
+
+Usage: python generate_dataset.py job.json [--output DIR] [--seed SEED] [--workers N] [--packed]
+       python generate_dataset.py --resume DIR [--workers N]
+
+The job file is a json object with the following keys:
+
+    output        directory the run is written to (created if missing, must not contain a previous run)
+    choices       modifier names, e.g. ["nose/nose-trans-in|out"]; empty or missing means every face modifier
+    step          step mode: distance between the values of every choice, e.g. 0.25
+    n             random mode: number of humans to draw (used instead of step)
+    sampling      random mode: "gaussian" (default), "lhs" (Latin hypercube) or "sobol" (needs scipy)
+    modifiers     modifiers.json written next to any run started from the GUI; needed for random mode and
+                  for an empty choice list
+    macrodetails  macrodetails lines written in every file (default: the defaults of the GUI)
+    seed          run seed (default: random, the chosen one is printed)
+    workers       number of worker processes (default 1)
+    packed        store the run as a packed dataset instead of .mhm files (default false)
+    split_ratios  e.g. {"train": 0.8, "test": 0.1, "validation": 0.1} (default 0.7 / 0.15 / 0.15)
+    split_key     hash "parameters" (default, a human always lands in the same split) or "index"
+    split_seed    seed of the split hash (default 0), independent of the run seed
+
+Every run records its spec, seed and progress in run.json; --resume continues an interrupted run from it.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import types
+
+# Register the plugin folder as a package without running its __init__, which needs the MakeHuman GUI.
+# This is done at import time so that spawned pool workers, which re-import this script, can find it too.
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules[_PACKAGE] = _package
+
+_generationEngine = importlib.import_module(_PACKAGE + "._generationEngine")
+_modifierMetadata = importlib.import_module(_PACKAGE + "._modifierMetadata")
+
+DEFAULT_MACRODETAILS = ("modifier macrodetails/Gender 1.0\n"
+                        "modifier macrodetails/Caucasian 1.000000\n"
+                        "modifier macrodetails/African 0.000000\n"
+                        "modifier macrodetails/Asian 0.000000\n"
+                        "modifier macrodetails/Age 0.26\n"
+                        "modifier macrodetails-universal/Weight 0.8")
+
+
+def build_job(spec):
+    path = spec["output"]
+    seed = spec.get("seed")
+    seed = random.randrange(2 ** 32) if seed is None else int(seed)
+    macrodetails = spec.get("macrodetails", DEFAULT_MACRODETAILS)
+    if isinstance(macrodetails, list):
+        macrodetails = "\n".join(macrodetails)
+    packed = bool(spec.get("packed", False))
+    splits = {"split_ratios": spec.get("split_ratios"), "split_key": spec.get("split_key", "parameters"),
+              "split_seed": int(spec.get("split_seed", 0))}
+    choices = list(spec.get("choices") or [])
+
+    metadata = None
+    if spec.get("modifiers"):
+        metadata = _modifierMetadata.ModifierMetadata.load(spec["modifiers"])
+
+    if len(choices) == 0:
+        if metadata is None:
+            raise ValueError("Either choices or a modifiers file must be given")
+        choices = metadata.names(_modifierMetadata.FACE_GROUPS)
+
+    if spec.get("n") is not None:
+        if metadata is None:
+            raise ValueError("Random mode needs a modifiers file with the modifier ranges")
+        return _generationEngine.GenerationJob(path, macrodetails, seed, modifiers=metadata.random_modifiers(choices),
+                                               n=int(spec["n"]), packed=packed,
+                                               sampling=spec.get("sampling", "gaussian"), **splits)
+
+    if spec.get("step") is None:
+        raise ValueError("The job must define either step or n")
+
+    step = float(spec["step"])
+    values = [[i / 100 for i in range(-100, 101, int(step * 100))] for _ in range(len(choices))]
+    return _generationEngine.GenerationJob(path, macrodetails, seed, choices=choices, values=values, packed=packed,
+                                           **splits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a face parametrization dataset without MakeHuman.")
+    parser.add_argument("job", nargs="?", help="json job file")
+    parser.add_argument("--resume", metavar="DIR", help="continue the interrupted run in DIR")
+    parser.add_argument("--output", help="output directory, overrides the job file")
+    parser.add_argument("--seed", type=int, help="run seed, overrides the job file")
+    parser.add_argument("--workers", type=int, help="worker processes, overrides the job file")
+    parser.add_argument("--packed", action="store_true", default=None, help="write a packed dataset")
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        return run(lambda progress: _generationEngine.GenerationEngine.resume(args.resume, args.workers or 1,
+                                                                               progress))
+
+    if not args.job:
+        parser.error("a job file is required unless --resume is given")
+
+    with open(args.job, "r") as json_file:
+        spec = json.load(json_file)
+
+    for key in ["output", "seed", "workers", "packed"]:
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+
+    os.makedirs(spec["output"], exist_ok=True)
+    job = build_job(spec)
+    return run(lambda progress: _generationEngine.GenerationEngine(job, int(spec.get("workers", 1)), progress))
+
+
+def run(create_engine):
+    start = time.time()
+
+    def progress(done, n):
+        elapsed = time.time() - start
+        print(f"{done}/{n} ({done / max(elapsed, 1e-9):.0f} humans/s)", file=sys.stderr)
+
+    engine = create_engine(progress)
+    job = engine.job
+    print(f"seed {job.seed}, {job.n} humans, {len(job.choices)} parameters, {engine.workers} workers",
+          file=sys.stderr)
+
+    done = engine.run()
+
+    elapsed = time.time() - start
+    print(f"generated {done} humans in {elapsed:.2f} s ({done / max(elapsed, 1e-9):.0f} humans/s)", file=sys.stderr)
+    if job.is_random:
+        print(f"coverage (centered L2 discrepancy of the first samples): {job.coverage(1024):.4f}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
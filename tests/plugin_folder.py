@@ -0,0 +1,8 @@
+"""Pytest plugin loaded by pytest.ini. The plugin __init__ needs the MakeHuman GUI, so the plugin folder is
+collected as a plain directory rather than as a package whose __init__ pytest would import."""
+import pytest
+
+
+def pytest_collect_directory(path, parent):
+    if path == parent.config.rootpath:
+        return pytest.Dir.from_parent(parent, path=path)
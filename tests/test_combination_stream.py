@@ -0,0 +1,44 @@
+"""CombinationStream.take against indexing the stream one position at a time."""
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+_combinationStream = importlib.import_module(_PACKAGE + "._combinationStream")
+
+
+@pytest.mark.parametrize("seed", [None, 0, 7])
+@pytest.mark.parametrize("values", [
+    [[-1.0, 0.0, 1.0]],
+    [[1, 2, 3], [0.5, -1.0], ["a", "b", "c", "d"]],
+    [[i / 100 for i in range(-100, 101, 20)] for _ in range(4)],
+    [[0.0]]
+])
+def test_take_matches_indexing(values, seed):
+    stream = _combinationStream.CombinationStream(values, seed)
+
+    assert stream.take(range(len(stream))) == [stream[position] for position in range(len(stream))]
+    assert stream.take([len(stream) - 1, 0]) == [stream[len(stream) - 1], stream[0]]
+    assert stream.take([]) == []
+
+
+def test_take_on_grids_beyond_int64():
+    stream = _combinationStream.CombinationStream([list(range(201)) for _ in range(9)], 5)
+    positions = [0, 5, 2 ** 62 + 3]
+
+    assert stream.take(positions) == [stream[position] for position in positions]
+
+
+def test_take_rejects_positions_out_of_range():
+    stream = _combinationStream.CombinationStream([[1, 2], [3, 4]], 1)
+
+    with pytest.raises(IndexError):
+        stream.take([0, 4])
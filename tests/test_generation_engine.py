@@ -0,0 +1,94 @@
+"""Smoke tests of the generation engine, in step, random and packed mode, with one and two worker processes.
+
+Only needs numpy: the plugin folder is registered as a package without running its __init__, which needs the
+MakeHuman GUI (as generate_dataset.py does)."""
+import importlib
+import json
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+_generationEngine = importlib.import_module(_PACKAGE + "._generationEngine")
+_packedDataset = importlib.import_module(_PACKAGE + "._packedDataset")
+_runManifest = importlib.import_module(_PACKAGE + "._runManifest")
+
+MACRODETAILS = "modifier macrodetails/Gender 1.0\nmodifier macrodetails/Age 0.26"
+CHOICES = ["nose/nose-trans-up|down", "chin/chin-prominent-decr|incr"]
+MODIFIERS = [(name, -1.0, 1.0, 0.0, 0.2) for name in CHOICES]
+
+
+def create_job(path, mode, packed=False):
+    if mode == "step":
+        values = [[-1.0, -0.5, 0.0, 0.5, 1.0] for _ in CHOICES]
+        return _generationEngine.GenerationJob(str(path), MACRODETAILS, 7, choices=CHOICES, values=values,
+                                               chunk_size=4, packed=packed, split_ratios={"train": 0.8, "test": 0.2})
+    return _generationEngine.GenerationJob(str(path), MACRODETAILS, 7, modifiers=MODIFIERS, n=23, chunk_size=4,
+                                           packed=packed, sampling=mode, split_ratios={"train": 0.8, "test": 0.2})
+
+
+def read_output(path, packed):
+    """Every human of a run, by split and file name or row, so that runs can be compared."""
+    if packed:
+        dataset = _packedDataset.PackedDataset(str(path))
+        return np.array(dataset.parameters).tolist(), np.array(dataset.splits).tolist()
+
+    humans = {}
+    for root, _, files in os.walk(str(path)):
+        for file_name in files:
+            if file_name.endswith(".mhm"):
+                with open(os.path.join(root, file_name), "r") as mhm_file:
+                    humans[os.path.relpath(os.path.join(root, file_name), str(path))] = mhm_file.read()
+    return humans
+
+
+@pytest.mark.parametrize("packed", [False, True])
+@pytest.mark.parametrize("mode", ["step", "gaussian", "sobol"])
+def test_workers_give_the_same_dataset(tmp_path, mode, packed):
+    outputs = []
+    for workers in [1, 2]:
+        path = tmp_path / str(workers)
+        path.mkdir()
+        job = create_job(path, mode, packed)
+
+        assert _generationEngine.GenerationEngine(job, workers).run() == job.n
+        assert _runManifest.RunManifest.load(str(path)).finished
+        outputs.append(read_output(path, packed))
+
+    if not packed:
+        assert len(outputs[0]) == job.n
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("packed", [False, True])
+def test_resume_completes_an_interrupted_run(tmp_path, packed, workers):
+    reference = tmp_path / "reference"
+    reference.mkdir()
+    _generationEngine.GenerationEngine(create_job(reference, "gaussian", packed)).run()
+
+    path = tmp_path / "resumed"
+    path.mkdir()
+    job = create_job(path, "gaussian", packed)
+    job.prepare_output()
+    manifest = _runManifest.RunManifest.create(str(path), job.to_spec())
+    # The run was interrupted after its first two chunks
+    for chunk in [0, 1]:
+        _generationEngine.generate_chunk(job, chunk)
+        manifest.mark_done(chunk)
+    manifest.flush()
+
+    done = _generationEngine.GenerationEngine.resume(str(path), workers).run()
+
+    assert done == job.n
+    with open(os.path.join(str(path), _runManifest.RunManifest.FILE_NAME), "r") as json_file:
+        assert json.load(json_file)["finished"]
+    assert read_output(path, packed) == read_output(reference, packed)
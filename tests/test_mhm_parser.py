@@ -0,0 +1,169 @@
+"""_mhmParser against the line by line parsing MhmImporter used before it."""
+import importlib
+import os
+import re
+import sys
+import types
+
+import pytest
+
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+_mhmParser = importlib.import_module(_PACKAGE + "._mhmParser")
+
+
+def legacy_translate(mhm_line):
+    # MhmImporter.translate_mhm_target_line_to_target_fragment before _mhmParser
+    name, weight = mhm_line.split(" ", 1)
+
+    weight = float(weight)
+    for opposite in _mhmParser.OPPOSITES:
+        negative, positive = opposite.split("-", 1)
+        mhm_term = negative + "|" + positive
+
+        if mhm_term in mhm_line:
+
+            if weight < 0.0:
+                name = name.replace(mhm_term, negative)
+                weight = -weight
+            else:
+                name = name.replace(mhm_term, positive)
+    if "/" in name:
+        dirname, name = name.split("/", 1)
+
+    return {"target": name, "value": weight}
+
+
+def legacy_parse_modifier_line(human_info, line):
+    # MhmImporter._parse_mhm_modifier_line before _mhmParser
+    line = str(line).replace("modifier ", "")
+
+    for simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height", "BodyProportions", "Asian", "African",
+                         "Caucasian", "BreastSize", "BreastFirmness"]:
+        macroline = line
+        macroline = macroline.replace("breast/", "")
+        macroline = macroline.replace("macrodetails/", "")
+        macroline = macroline.replace("macrodetails-height/", "")
+        macroline = macroline.replace("macrodetails-universal/", "")
+        macroline = macroline.replace("macrodetails-proportions/", "")
+
+        if macroline.startswith(simple_macro + " "):
+            target, weight = macroline.split(" ", 1)
+            weight = float(weight)
+
+            if simple_macro in ["Asian", "African", "Caucasian"]:
+                human_info["phenotype"]["race"][simple_macro.lower()] = weight
+                return
+            if simple_macro in ["Age", "Gender", "Muscle", "Weight", "Height"]:
+                human_info["phenotype"][simple_macro.lower()] = weight
+                return
+            if simple_macro == "BodyProportions":
+                human_info["phenotype"]["proportions"] = weight
+                return
+
+    target = legacy_translate(line)
+    if not "targets" in human_info or not human_info["targets"]:
+        human_info["targets"] = []
+    human_info["targets"].append(target)
+
+
+def legacy_parse_string(mhm_string, filename):
+    # The parsing part of MhmImporter.deserialize_from_mhm
+    human_info = _mhmParser.create_default_human_info_dict()
+    name = None
+
+    for line in mhm_string.splitlines():
+        if line.startswith("modifier"):
+            legacy_parse_modifier_line(human_info, line)
+        else:
+            if line.startswith("skinMaterial"):
+                skinLine = line.replace("skinMaterial skins/", "")
+                skinLine = skinLine.replace("skinMaterial", "")
+                human_info["skin_mhmat"] = skinLine
+                human_info["skin_material_type"] = "ENHANCED_SSS"
+            if line.startswith("name "):
+                name = line.replace("name ", "")
+
+    if "rig" not in human_info or not human_info["rig"]:
+        human_info["rig"] = "default"
+
+    if not name:
+        match = re.search(r'.*([^/\\]*)\.(mhm|MHM)$', filename)
+        name = match.group(1)
+
+    human_info["name"] = name
+    return human_info
+
+
+MACRODETAILS = """modifier macrodetails/Gender 1.000000
+modifier macrodetails/Caucasian 0.500000
+modifier macrodetails/African 0.250000
+modifier macrodetails/Asian 0.250000
+modifier macrodetails/Age 0.260000
+modifier macrodetails-universal/Weight 0.800000
+modifier macrodetails-universal/Muscle 0.300000
+modifier macrodetails-height/Height 0.900000
+modifier macrodetails-proportions/BodyProportions 0.100000"""
+
+FACE = """modifier nose/nose-trans-up|down -0.400000
+modifier nose/nose-trans-in|out 0.300000
+modifier eyes/r-eye-bag-in|out -1.000000
+modifier chin/chin-prominent-decr|incr 0.000000
+modifier head/head-oval 0.700000
+modifier head/head-back-scale-decr|incr -0.000000
+modifier ears/r-ear-shape-pointed|triangle -0.200000
+modifier mouth/mouth-lowerlip-height-decr|incr 1.000000"""
+
+BREAST = """modifier breast/BreastSize 0.600000
+modifier breast/BreastFirmness 0.400000"""
+
+
+@pytest.mark.parametrize("mhm_string", [
+    "version v1.1.1\nname human_1\n" + MACRODETAILS + "\n" + FACE,
+    MACRODETAILS + "\n" + BREAST + "\nskinMaterial skins/default.mhmat\nname with breast",
+    FACE + "\nskinMaterial skins/young_caucasian_female/young_caucasian_female.mhmat",
+    "name only_a_name",
+    ""
+])
+@pytest.mark.parametrize("filename", ["/models/1/human_7.mhm", "human.MHM"])
+def test_parse_mhm_string_matches_legacy(mhm_string, filename):
+    assert _mhmParser.parse_mhm_string(mhm_string, filename) == legacy_parse_string(mhm_string, filename)
+
+
+def test_negative_weights_pick_the_negative_target():
+    targets = _mhmParser.parse_mhm_string(FACE, "a.mhm")["targets"]
+
+    # Only the pairs of OPPOSITES are split, in their order: up|down is kept as is, with its negative weight
+    assert {"target": "nose-trans-up|down", "value": -0.4} in targets
+    assert {"target": "nose-trans-out", "value": 0.3} in targets
+    assert {"target": "r-eye-bag-in", "value": 1.0} in targets
+    assert {"target": "r-ear-shape-pointed", "value": 0.2} in targets
+    assert {"target": "head-oval", "value": 0.7} in targets
+
+
+def test_breast_macros_are_loaded_as_targets():
+    human_info = _mhmParser.parse_mhm_string(BREAST, "a.mhm")
+
+    assert human_info["targets"] == [{"target": "BreastSize", "value": 0.6}, {"target": "BreastFirmness", "value": 0.4}]
+    assert human_info["phenotype"] == _mhmParser.get_default_macro_info_dict()
+
+
+def test_macros_set_the_phenotype():
+    phenotype = _mhmParser.parse_mhm_string(MACRODETAILS, "a.mhm")["phenotype"]
+
+    assert phenotype["race"] == {"caucasian": 0.5, "african": 0.25, "asian": 0.25}
+    assert (phenotype["gender"], phenotype["age"], phenotype["weight"]) == (1.0, 0.26, 0.8)
+    assert (phenotype["muscle"], phenotype["height"], phenotype["proportions"]) == (0.3, 0.9, 0.1)
+
+
+def test_parse_mhm_file_reads_the_file(tmp_path):
+    filename = tmp_path / "human_3.mhm"
+    filename.write_text(MACRODETAILS + "\n" + FACE)
+
+    assert _mhmParser.parse_mhm_file(str(filename)) == legacy_parse_string(filename.read_text(), str(filename))
+    with pytest.raises(IOError):
+        _mhmParser.parse_mhm_file(str(tmp_path / "missing.mhm"))
@@ -0,0 +1,114 @@
+"""_shapekeyCodec against the string replacements TargetService used before it, and name round trips."""
+import importlib
+import os
+import random
+import re
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+codec = importlib.import_module(_PACKAGE + "._shapekeyCodec")
+SHAPEKEY_ENCODING = codec.SHAPEKEY_ENCODING
+
+
+def legacy_encode(original_name):
+    # TargetService.encode_shapekey_name before the codec
+    name = str(original_name)
+    for code in SHAPEKEY_ENCODING:
+        name = name.replace(code[0], code[1])
+    return name
+
+
+def legacy_decode(encoded_name):
+    name = str(encoded_name)
+    for code in SHAPEKEY_ENCODING:
+        name = name.replace(code[1], code[0])
+    return name
+
+
+def legacy_filename_to_shapekey_name(filename, *, macrodetail=False, encode_name=None):
+    name = os.path.basename(filename)
+
+    name = re.sub(r'\.gz$', "", name, flags=re.IGNORECASE)
+    name = re.sub(r'\.p?target$', "", name, flags=re.IGNORECASE)
+
+    if macrodetail is None:
+        path_items = Path(os.path.abspath(filename)).parts
+        macrodetail = codec.MACRO_PATH_PATTERN in '/'.join(path_items).lower()
+
+    if macrodetail:
+        name = "macrodetail-" + name
+        if encode_name is None:
+            encode_name = True
+
+    if encode_name is None and len(name) > 60:
+        encode_name = True
+
+    if encode_name:
+        name = legacy_encode(name)
+
+    return name
+
+
+def synthetic_paths(n):
+    rng = random.Random(0)
+    words = [word for word, code in SHAPEKEY_ENCODING] + ["universal", "old", "min", "max", "decr", "incr", "nose"]
+    suffixes = [".target.gz", ".target", ".ptarget", ".gz", ".TARGET.GZ", "", ".gz.target", ".target.gz.gz"]
+    directories = ["/data/targets/nose", "/x/mpfb/data/targets/macrodetails", "/x/mpfb/data/targets/macrodetails/height",
+                   "relative/mpfb/data/targets/macrodetails", "nose"]
+
+    paths = []
+    for _ in range(n):
+        separator = rng.choice(["-", "_", ""])
+        name = separator.join(rng.choice(words) for _ in range(rng.randint(1, 7)))
+        paths.append(os.path.join(rng.choice(directories), name + rng.choice(suffixes)))
+    return paths
+
+
+PATHS = synthetic_paths(300) + [
+    "/x/mpfb/data/targets/macrodetails/universal-female-young-averagemuscle-averageweight.target.gz",
+    "/x/mpfb/data/targets/macrodetails/height/female-young-averagemuscle-averageweight-maxheight.target.gz",
+    "/x/mpfb/data/targets/nose/nose-trans-up.target.gz",
+    "/x/mpfb/data/targets/breast/female-young-averagemuscle-averageweight-maxcup-averagefirmness.target.gz",
+    "/x/mpfb/data/targets/ears/r-ear-shape-pointed-very-long-name-beyond-sixty-characters-for-sure.target.gz"
+]
+
+
+@pytest.mark.parametrize("encode_name", [None, False, True])
+@pytest.mark.parametrize("macrodetail", [False, True, None])
+def test_filename_to_shapekey_name_matches_legacy(macrodetail, encode_name):
+    for path in PATHS:
+        expected = legacy_filename_to_shapekey_name(path, macrodetail=macrodetail, encode_name=encode_name)
+        assert codec.filename_to_shapekey_name(path, macrodetail=macrodetail, encode_name=encode_name) == expected
+        # Cached the second time
+        assert codec.filename_to_shapekey_name(path, macrodetail=macrodetail, encode_name=encode_name) == expected
+
+
+def test_encode_and_decode_match_legacy():
+    for path in PATHS:
+        for name in [os.path.basename(path), legacy_encode(os.path.basename(path)), "Basis", "", "$", "$zz-male"]:
+            assert codec.encode_shapekey_name(name) == legacy_encode(name)
+            assert codec.decode_shapekey_name(name) == legacy_decode(name)
+
+
+def test_names_round_trip():
+    for path in PATHS:
+        name = os.path.basename(path)
+        encoded = codec.encode_shapekey_name(name)
+
+        assert codec.decode_shapekey_name(encoded) == name
+        for word, code in SHAPEKEY_ENCODING:
+            assert word not in encoded
+
+
+def test_long_names_fit_a_shape_key():
+    for path in PATHS[-5:-1]:
+        assert len(codec.filename_to_shapekey_name(path, macrodetail=None)) <= 61
@@ -0,0 +1,122 @@
+"""TargetIndex against the rglob scan TargetService.target_full_path used before, and the reuse of its cache file."""
+import importlib
+import json
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+_PACKAGE = "faceparametrization"
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+    sys.modules[_PACKAGE] = _package
+
+_targetIndex = importlib.import_module(_PACKAGE + "._targetIndex")
+TargetIndex = _targetIndex.TargetIndex
+
+FILES = ["nose/nose-trans-up.target.gz", "nose/nose-trans-down.target.gz", "nose/nose-trans-up-extra.target.gz",
+         "chin/chin-prominent-decr.target.gz", "chin/chin-prominent-incr.target.gz", "Head/Head-Oval.target.gz",
+         "a/dup-name.target.gz", "b/dup-name.target.gz", "b/deep/dup-name-longer.target.gz", "ears/ear.target",
+         "ears/readme.txt", "top-level.target.gz"]
+
+
+def legacy_target_full_path(targets_dir, target_name):
+    for name in Path(targets_dir).rglob("*.target.gz"):
+        bn = str(os.path.basename(name)).lower()
+        if bn.startswith(str(target_name).lower()):
+            return str(name)
+
+
+@pytest.fixture
+def targets_dir(tmp_path):
+    targets_dir = tmp_path / "targets"
+    for name in FILES:
+        (targets_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (targets_dir / name).write_bytes(b"")
+    return str(targets_dir)
+
+
+@pytest.mark.parametrize("target_name", [
+    "nose-trans-up",        # exact, and the prefix of another file
+    "nose-trans-up.target.gz",
+    "nose-trans",           # prefix of several files
+    "chin-prominent-",
+    "dup-name",             # in two directories, the first one in rglob order wins
+    "dup-name-l",
+    "head-oval",            # case-insensitive
+    "HEAD-OVAL",
+    "top-level",
+    "",                     # every file matches
+    "ear",                  # only a .target file, which is not indexed
+    "readme",
+    "missing"
+])
+def test_resolve_matches_rglob_scan(targets_dir, target_name):
+    index = TargetIndex.build(targets_dir)
+
+    expected = legacy_target_full_path(targets_dir, target_name)
+    assert index.resolve(target_name) == expected
+    # Second lookup is answered by the memo
+    assert index.resolve(target_name) == expected
+
+
+def test_missing_names_resolve_to_none(targets_dir):
+    assert TargetIndex.build(targets_dir).resolve("missing") is None
+
+
+def test_cache_file_is_reused_while_directories_are_unchanged(targets_dir, tmp_path, monkeypatch):
+    cache_file = str(tmp_path / "cache" / "target_index.json")
+    built = TargetIndex.load_or_build(targets_dir, cache_file)
+    assert os.path.exists(cache_file)
+
+    def fail(*args):
+        raise AssertionError("the index was rebuilt")
+
+    monkeypatch.setattr(TargetIndex, "build", fail)
+    loaded = TargetIndex.load_or_build(targets_dir, cache_file)
+
+    assert loaded.paths == built.paths
+    assert loaded.resolve("dup-name") == legacy_target_full_path(targets_dir, "dup-name")
+
+
+def test_cache_file_is_rebuilt_when_a_directory_changes(targets_dir, tmp_path):
+    cache_file = str(tmp_path / "target_index.json")
+    TargetIndex.load_or_build(targets_dir, cache_file)
+
+    directory = os.path.join(targets_dir, "nose")
+    Path(directory, "nose-new.target.gz").write_bytes(b"")
+    # Filesystems with a coarse mtime could miss the change otherwise
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    index = TargetIndex.load_or_build(targets_dir, cache_file)
+
+    assert index.resolve("nose-new") == os.path.join(directory, "nose-new.target.gz")
+    with open(cache_file, "r") as json_file:
+        assert os.path.join(directory, "nose-new.target.gz") in json.load(json_file)["paths"]
+
+
+def test_cache_file_of_another_directory_is_ignored(targets_dir, tmp_path):
+    cache_file = str(tmp_path / "target_index.json")
+    TargetIndex.load_or_build(targets_dir, cache_file)
+
+    other = tmp_path / "other"
+    (other / "nose").mkdir(parents=True)
+    (other / "nose" / "nose-other.target.gz").write_bytes(b"")
+
+    index = TargetIndex.load_or_build(str(other), cache_file)
+
+    assert index.resolve("nose-trans-up") is None
+    assert index.resolve("nose-other") == str(other / "nose" / "nose-other.target.gz")
+
+
+def test_corrupt_cache_file_is_rebuilt(targets_dir, tmp_path):
+    cache_file = tmp_path / "target_index.json"
+    cache_file.write_text("{not json")
+
+    index = TargetIndex.load_or_build(targets_dir, str(cache_file))
+
+    assert index.resolve("chin") == legacy_target_full_path(targets_dir, "chin")